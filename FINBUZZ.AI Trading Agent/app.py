@@ -1,16 +1,47 @@
 # app.py
 from __future__ import annotations
-import time
+import json
 import threading
 import gradio as gr
 import pandas as pd
 from trader_agent import TraderAgent
+from sim_clock import SimClock, REALTIME, ACCELERATED, MAX_SPEED, BAR_SECONDS
+from risk import get_risk_engine
 
 agent = None
 runner_thread = None
 runner_stop = threading.Event()
-runner_speed_sec = 60.0  # 60 seconds per bar for 1-minute mode
+sim_clock = SimClock()
 is_running = False
+portfolio_frame = None  # (portfolio, version, DataFrame) for the 1s live poll
+analytics_cache = None  # (portfolio, key, figure, fills plotted, outputs) for the 10s analytics refresh
+
+# Speed mode -> (clock mode, speed multiplier); None means "use the N× slider"
+SPEED_MODES = {
+    "Fast (1min per bar)": (ACCELERATED, BAR_SECONDS / 60.0),
+    "Real-time (5m)": (REALTIME, 1.0),
+    "Accelerated (N×)": (ACCELERATED, None),
+    "Max speed": (MAX_SPEED, 1.0),
+}
+
+def _stop_runner(timeout: float = 30.0) -> bool:
+    """Stop the runner thread, paused or not, and wait for it to exit; False if it did not exit in time"""
+    global runner_thread
+    if runner_thread is None:
+        return True
+    runner_stop.set()
+    sim_clock.resume()  # wake a parked runner; start() re-anchors the clock for the next run
+    runner_thread.join(timeout)
+    if runner_thread.is_alive():
+        return False
+    runner_thread = None
+    return True
+
+def _retire_agent():
+    """Detach the current agent before replacing it: free its risk slot, flush and close its journal"""
+    if agent is not None:
+        agent.release_risk()
+        agent.journal.close()
 
 def launch_trader(starting_cash: float, ticker: str):
     if starting_cash is None or starting_cash <= 0:
@@ -18,7 +49,10 @@ def launch_trader(starting_cash: float, ticker: str):
     if not ticker or "." not in ticker:
         return gr.update(value="Enter an NSE ticker like HUDCO.NS"), None, None, None, None
     global agent
+    if not _stop_runner():
+        return gr.update(value="⏳ The AI agent is still finishing its current bar - try again shortly"), None, None, None, None
     try:
+        _retire_agent()
         agent = TraderAgent()  # This creates the AI agent
         state = agent.initialize(ticker.strip(), float(starting_cash))
         return (
@@ -34,29 +68,66 @@ def launch_trader(starting_cash: float, ticker: str):
             None, None, None, None
         )
 
-def _loop_runner(speed_mode: str):
-    """AI Agent continuous trading loop"""
-    global agent, is_running, runner_stop, runner_speed_sec
+def resume_trader(checkpoint_path: str):
+    global agent
+    if is_running and not sim_clock.paused:
+        return gr.update(value="⏸️ Pause the running AI agent before resuming a checkpoint"), None, None, None, None
+    if not checkpoint_path or not checkpoint_path.strip():
+        return gr.update(value="Enter a checkpoint path like checkpoints/HUDCO_NS_session.ckpt"), None, None, None, None
+    if not _stop_runner():
+        return gr.update(value="⏳ The AI agent is still finishing its current bar - try again shortly"), None, None, None, None
+    try:
+        _retire_agent()
+        agent = TraderAgent()
+        state = agent.resume(checkpoint_path.strip())
+        return (
+            gr.update(value=f"♻️ AI AGENT RESUMED from {checkpoint_path.strip()}"),
+            state["fig"],
+            pd.DataFrame([state["portfolio"]]),
+            "\n".join(state["logs"]),
+            gr.update(visible=True)
+        )
+    except Exception as e:
+        return (
+            gr.update(value=f"❌ Error resuming AI agent: {str(e)}"),
+            None, None, None, None
+        )
+
+def _configure_clock(speed_mode: str, multiplier: float):
+    mode, speed = SPEED_MODES.get(speed_mode, SPEED_MODES["Fast (1min per bar)"])
+    if speed is None:
+        speed = max(float(multiplier or 1.0), 0.1)
+    sim_clock.set_speed(mode, speed)
+
+def _loop_runner():
+    """AI Agent continuous trading loop, paced by the simulation clock"""
+    global agent, is_running, runner_stop
     is_running = True
     step_count = 0
     
     try:
-        while not runner_stop.is_set():
+        # Bars are due on monotonic deadlines, so step runtime does not add drift
+        while sim_clock.wait_next(runner_stop):
             step_count += 1
             if agent and agent.state:
                 agent.state.log(f"🤖 AI Agent executing step {step_count}...")
             
             # Use the AI agent's step_once method
             step = agent.step_once()  # This is where AI agent makes trading decisions
+            sim_clock.advance()
             
             if step.get("done"):
                 if agent and agent.state:
                     agent.state.log("✅ Trading session completed by AI Agent")
+                    latency_path = agent.dump_latency()
+                    agent.state.log(f"⏱️ Step latency report saved: {latency_path}")
+                    agent.journal.close()
                 break
-                
-            # Update speed based on mode
-            sleep_time = 300 if speed_mode == "Real-time (5m)" else runner_speed_sec
-            time.sleep(sleep_time)
+            
+            # Paused while this bar was running: checkpoint now that it is complete
+            if sim_clock.paused:
+                path = agent.checkpoint()
+                agent.state.log(f"⏸️ AI Agent paused at bar {agent.state.stream.position}. Checkpoint: {path}")
             
     except Exception as e:
         if agent and agent.state:
@@ -64,22 +135,60 @@ def _loop_runner(speed_mode: str):
     finally:
         is_running = False
 
-def start_run(speed_mode: str):
+def start_run(speed_mode: str, multiplier: float = 20.0):
     global runner_thread, runner_stop
     if agent is None:
         return gr.update(value="❌ Launch the AI agent first from Setup tab.")
+    _configure_clock(speed_mode, multiplier)
     if is_running:
-        return gr.update(value="🤖 AI Agent already running...")
+        if sim_clock.paused:
+            sim_clock.resume()
+            return gr.update(value=f"▶️ AI AGENT RESUMED in {speed_mode} mode...")
+        return gr.update(value=f"🤖 AI Agent already running - speed set to {speed_mode}")
     
     runner_stop.clear()
-    t = threading.Thread(target=_loop_runner, args=(speed_mode,), daemon=True)
-    t.start()
+    sim_clock.start(agent.state.stream.position)
+    runner_thread = threading.Thread(target=_loop_runner, daemon=True)
+    runner_thread.start()
     return gr.update(value=f"🤖 AI AGENT STARTED in {speed_mode} mode...")
 
 def pause_run():
-    global runner_stop
-    runner_stop.set()
-    return gr.update(value="⏸️ AI Agent paused.")
+    if agent is None or agent.state is None:
+        return gr.update(value="⏸️ AI Agent paused.")
+    if not is_running:
+        path = agent.checkpoint()
+        return gr.update(value=f"⏸️ AI Agent paused. Checkpoint: {path}")
+    if sim_clock.pause():
+        # Runner is parked between bars, so the state is consistent
+        path = agent.checkpoint()
+        return gr.update(value=f"⏸️ AI Agent paused at bar {agent.state.stream.position}. Checkpoint: {path}")
+    return gr.update(value="⏸️ AI Agent pausing after the current bar...")
+
+def seek_run(bar: float):
+    """Fast-forward the session to a trading bar; the policy skips those bars but resting orders and stops still fill"""
+    if agent is None or agent.state is None:
+        return gr.update(value="❌ Launch the AI agent first from Setup tab.")
+    if is_running and not (sim_clock.paused and sim_clock.parked):
+        return gr.update(value="⏸️ Pause the AI agent before seeking")
+    res = agent.seek(int(bar or 0))
+    if not res.get("ok"):
+        return gr.update(value=f"❌ {res.get('reason')}")
+    sim_clock.seek(res["bar"])
+    return gr.update(value="\n".join(agent.state.logs[-200:]))
+
+def toggle_kill_switch():
+    """Block (or re-allow) new buys in every session sharing the risk engine"""
+    engine = get_risk_engine()
+    if engine.killed:
+        engine.reset_kill()
+        msg = "✅ KILL SWITCH RESET - new buys allowed again"
+    else:
+        engine.kill("manual (UI)")
+        msg = "🛑 KILL SWITCH ACTIVE - all new buys blocked, exits still allowed"
+    if agent is not None and agent.state is not None:
+        agent.state.log(msg)
+        return gr.update(value="\n".join(agent.state.logs[-200:]))
+    return gr.update(value=msg)
 
 def step_once():
     """Single step using AI agent"""
@@ -91,10 +200,10 @@ def step_once():
         step = agent.step_once()  # AI agent makes BUY/SELL/HOLD decision here
         
         if step.get("done"):
-            return agent.state.chart.to_json(), pd.DataFrame([agent.state.portfolio.snapshot()]), "✅ Trading completed"
+            agent.journal.close()
+            return agent.state.chart.to_json(), _portfolio_frame(), "✅ Trading completed"
         
-        snap = agent.state.portfolio.snapshot()
-        return agent.state.chart.to_json(), pd.DataFrame([snap]), "\n".join(agent.state.logs[-200:])
+        return agent.state.chart.to_json(), _portfolio_frame(), "\n".join(agent.state.logs[-200:])
         
     except Exception as e:
         error_msg = f"❌ AI Agent step failed: {str(e)}"
@@ -102,52 +211,69 @@ def step_once():
             agent.state.log(error_msg)
         return None, None, error_msg
 
-def fetch_live_state():
+def _portfolio_frame():
+    """Portfolio table, rebuilt only when the portfolio version changes"""
+    global portfolio_frame
+    portfolio = agent.state.portfolio
+    if portfolio_frame is None or portfolio_frame[0] is not portfolio or portfolio_frame[1] != portfolio.version:
+        portfolio_frame = (portfolio, portfolio.version, pd.DataFrame([portfolio.snapshot()]))
+    return portfolio_frame[2]
+
+def fetch_live_state(sent=None):
+    """
+    1s poll: skip components unchanged since this viewer's last poll (gr.update() leaves a component as is).
+    A changed chart is still sent as the whole figure; /chart_delta is for external clients only.
+    """
     if agent is None or agent.state is None:
-        return None, None, None
-    snap = agent.state.portfolio.snapshot()
-    return agent.state.chart.to_json(), pd.DataFrame([snap]), "\n".join(agent.state.logs[-200:])
-
-def get_ai_analytics():
-    """Get AI analytics without changing core logic"""
+        return gr.update(), gr.update(), gr.update(), sent
+    state = agent.state
+    chart = state.chart
+    sent = dict(sent or {})
+    outputs = []
+    for name, key, build in (
+        ("chart", (chart.epoch, chart.version), chart.to_json),
+        ("portfolio", (chart.epoch, state.portfolio.version), _portfolio_frame),
+        ("logs", (chart.epoch, len(state.logs)), lambda: "\n".join(state.logs[-200:])),
+    ):
+        if sent.get(name) == key:
+            outputs.append(gr.update())
+        else:
+            outputs.append(build())
+            sent[name] = key
+    return (*outputs, sent)
+
+def get_chart_delta(cursor=None):
+    """Candles, markers and overlay points appended since `cursor`, for external API clients (the dashboard plot
+    does not use it); a reset carries the full figure to start from"""
     if agent is None or agent.state is None:
-        return None, None, None, None
-    
+        return {}
+    chart = agent.state.chart
+    delta = chart.delta_since(cursor)
+    if delta["reset"]:
+        delta["figure"] = json.loads(chart.to_json().to_json())
+    return delta
+
+def get_chart_compact(epoch=None):
+    """Compact columnar chart payload; the styling is added when the caller's epoch is not the chart's"""
+    if agent is None or agent.state is None:
+        return {}
+    chart = agent.state.chart
+    out = {"payload": chart.compact_payload()}
+    if epoch != chart.epoch:
+        out["style"] = chart.compact_style()
+    return out
+
+def get_latency_report():
+    """Per-stage step latency histograms (p50/p95/p99 in ms) for the live session"""
+    if agent is None or agent.state is None:
+        return {}
+    return agent.latency_report()
+
+def _analytics_figure():
+    """Analytics subplots with empty traces: 0 P&L line, 1 trade counts, 2 value gauge, 3 win rate gauge"""
     import plotly.graph_objects as go
     from plotly.subplots import make_subplots
     
-    # Get current portfolio data
-    snap = agent.state.portfolio.snapshot()
-    
-    # Get trade history from portfolio
-    trades = agent.state.portfolio.trade_log if hasattr(agent.state.portfolio, 'trade_log') else []
-    
-    # Create performance metrics
-    total_trades = len(trades)
-    buy_trades = [t for t in trades if t.side == "BUY"]
-    sell_trades = [t for t in trades if t.side == "SELL"]
-    
-    # Calculate P&L over time
-    pnl_history = []
-    cumulative_pnl = 0
-    timestamps = []
-    
-    for i, trade in enumerate(trades):
-        if trade.side == "SELL" and i > 0:
-            # Simple P&L calculation
-            prev_buy = None
-            for j in range(i-1, -1, -1):
-                if trades[j].side == "BUY":
-                    prev_buy = trades[j]
-                    break
-            if prev_buy:
-                pnl = (trade.price - prev_buy.price) * trade.qty
-                cumulative_pnl += pnl
-        
-        pnl_history.append(cumulative_pnl)
-        timestamps.append(trade.ts)
-    
-    # Create analytics charts
     fig = make_subplots(
         rows=2, cols=2,
         subplot_titles=("📈 Cumulative P&L", "📊 Trade Distribution", "💰 Portfolio Value", "🎯 Win Rate"),
@@ -156,24 +282,23 @@ def get_ai_analytics():
     )
     
     # P&L Chart
-    if pnl_history and timestamps:
-        fig.add_trace(
-            go.Scatter(
-                x=timestamps[-len(pnl_history):],
-                y=pnl_history,
-                mode='lines+markers',
-                name='Cumulative P&L',
-                line=dict(color='#00ff88', width=3),
-                marker=dict(size=8)
-            ),
-            row=1, col=1
-        )
+    fig.add_trace(
+        go.Scatter(
+            x=[],
+            y=[],
+            mode='lines+markers',
+            name='Cumulative Realized P&L',
+            line=dict(color='#00ff88', width=3),
+            marker=dict(size=8)
+        ),
+        row=1, col=1
+    )
     
     # Trade Distribution
     fig.add_trace(
         go.Bar(
             x=['Buy Orders', 'Sell Orders'],
-            y=[len(buy_trades), len(sell_trades)],
+            y=[0, 0],
             marker_color=['#00ff88', '#ff4444'],
             name='Trade Count'
         ),
@@ -184,11 +309,10 @@ def get_ai_analytics():
     fig.add_trace(
         go.Indicator(
             mode="number+gauge+delta",
-            value=snap.get('cash', 0) + snap.get('shares', 0) * snap.get('last_price', 0),
+            value=0,
             domain={'x': [0, 1], 'y': [0, 1]},
             title={'text': "Portfolio Value (₹)"},
-            gauge={'axis': {'range': [0, snap.get('cash', 10000) * 2]},
-                   'bar': {'color': "#00ff88"},
+            gauge={'bar': {'color': "#00ff88"},
                    'bgcolor': "white",
                    'borderwidth': 2,
                    'bordercolor': "#00ff88"}
@@ -197,15 +321,10 @@ def get_ai_analytics():
     )
     
     # Win Rate Indicator
-    profitable_trades = sum(1 for i, trade in enumerate(trades) 
-                          if trade.side == "SELL" and i > 0 and 
-                          any(t.side == "BUY" and t.price < trade.price for t in trades[:i]))
-    win_rate = (profitable_trades / len(sell_trades) * 100) if sell_trades else 0
-    
     fig.add_trace(
         go.Indicator(
             mode="number+gauge",
-            value=win_rate,
+            value=0,
             domain={'x': [0, 1], 'y': [0, 1]},
             title={'text': "Win Rate (%)"},
             gauge={'axis': {'range': [0, 100]},
@@ -227,16 +346,65 @@ def get_ai_analytics():
         plot_bgcolor='#1a1a1a',
         font=dict(color='white', family="JetBrains Mono")
     )
+    return fig
+
+def get_ai_analytics():
+    """
+    Analytics panel for the 10s timer. Counts, cumulative P&L, win/loss and
+    risk figures are running totals kept by the portfolio, so a refresh is
+    O(1) apart from re-plotting the P&L line when fills were added; an
+    unchanged portfolio returns the previous result as is.
+    """
+    global analytics_cache
+    if agent is None or agent.state is None:
+        return None, None, None, None
+    
+    portfolio = agent.state.portfolio
+    key = (portfolio.version, len(portfolio.equity_curve))
+    if analytics_cache is not None and analytics_cache[0] is portfolio:
+        _, cached_key, fig, plotted, outputs = analytics_cache
+        if cached_key == key:
+            return outputs
+    else:
+        fig, plotted = _analytics_figure(), -1
+    
+    # Get current portfolio data
+    snap = portfolio.snapshot()
+    trades = portfolio.trade_log
+    lot_stats = portfolio.trade_stats()
+    risk = portfolio.risk_stats()
+    starting_equity = portfolio.equity_curve.starting_equity
+    total_trades = len(trades)
+    n_buys, n_sells = trades.buys, trades.sells
+    
+    # Realized P&L over time, as matched by the portfolio's lot engine
+    if total_trades != plotted:
+        fig.data[0].update(x=trades.wall_times(), y=trades.cum_pnl.view)
+        fig.data[1].y = [n_buys, n_sells]
+    fig.data[2].update(
+        value=snap.get('cash', 0) + snap.get('shares', 0) * snap.get('last_price', 0),
+        delta={'reference': starting_equity},
+        gauge={'axis': {'range': [0, max(risk['peak_equity'], starting_equity) * 1.25]}}
+    )
+    fig.data[3].value = lot_stats["win_rate"] * 100
     
     # Create summary stats
     stats_data = {
-        'Metric': ['Total Trades', 'Buy Orders', 'Sell Orders', 'Current P&L', 'Current Shares', 'Available Cash'],
-        'Value': [total_trades, len(buy_trades), len(sell_trades), 
+        'Metric': ['Total Trades', 'Buy Orders', 'Sell Orders', 'Current P&L', 'Current Shares', 'Available Cash',
+                   'Fees Paid', 'Wins / Losses', 'Avg Holding (min)', 'Lot Method',
+                   'Max Drawdown', 'Sharpe', 'Sortino', 'Volatility (ann.)', 'Time In Market'],
+        'Value': [total_trades, n_buys, n_sells, 
                  f"₹{snap.get('total_pnl', 0):.2f}", snap.get('shares', 0), 
-                 f"₹{snap.get('cash', 0):.2f}"]
+                 f"₹{snap.get('cash', 0):.2f}", f"₹{snap.get('fees_paid', 0):.2f}",
+                 f"{lot_stats['wins']} / {lot_stats['losses']}", lot_stats['avg_holding_minutes'],
+                 lot_stats['lot_method'],
+                 f"{risk['max_drawdown_pct']:.2f}% (₹{risk['max_drawdown']:.2f})", risk['sharpe'], risk['sortino'],
+                 f"{risk['volatility_pct']:.2f}%", f"{risk['exposure_time_pct']:.1f}%"]
     }
     
-    return fig, pd.DataFrame(stats_data), f"📊 Analytics Updated | Trades: {total_trades} | P&L: ₹{snap.get('total_pnl', 0):.2f}", snap.get('total_pnl', 0)
+    outputs = (fig, pd.DataFrame(stats_data), f"📊 Analytics Updated | Trades: {total_trades} | P&L: ₹{snap.get('total_pnl', 0):.2f}", snap.get('total_pnl', 0))
+    analytics_cache = (portfolio, key, fig, total_trades, outputs)
+    return outputs
 
 # Enhanced Premium CSS - Fixed font and removed green strips
 custom_css = """
@@ -530,6 +698,8 @@ with gr.Blocks(theme=gr.themes.Soft(), css=custom_css) as demo:
             **⚡ SPEED MODES:**
             - **Fast (1min per bar):** Rapid simulation - 60 second intervals
             - **Real-time (5m):** Live market simulation - 5 minute intervals
+            - **Accelerated (N×):** Replay at N× market pace with realistic relative timing
+            - **Max speed:** No waiting between bars
             
             **🤖 AI AGENT REQUIREMENTS:**
             - Requires OpenAI API Key or Gemini API Key in .env file
@@ -559,20 +729,52 @@ with gr.Blocks(theme=gr.themes.Soft(), css=custom_css) as demo:
                     elem_classes="logs-container"
                 )
 
+        with gr.Row():
+            with gr.Column(scale=3):
+                checkpoint_path = gr.Textbox(
+                    label="♻️ Resume From Checkpoint",
+                    value="checkpoints/HUDCO_NS_session.ckpt",
+                    elem_classes="input-field"
+                )
+            with gr.Column(scale=1):
+                resume_btn = gr.Button(
+                    "♻️ RESUME SESSION",
+                    elem_classes="secondary-btn"
+                )
+
         launch_btn.click(
             launch_trader, inputs=[cash, ticker],
             outputs=[status, preview_fig, preview_port, preview_logs, tab2_visible]
         )
+        resume_btn.click(
+            resume_trader, inputs=[checkpoint_path],
+            outputs=[status, preview_fig, preview_port, preview_logs, tab2_visible]
+        )
 
     with gr.Tab("🎯 AI Agent Trading"):
         with gr.Row():
             with gr.Column(scale=1):
                 speed = gr.Radio(
-                    ["Fast (1min per bar)", "Real-time (5m)"],
+                    list(SPEED_MODES),
                     value="Fast (1min per bar)", 
                     label="⚡ AI Agent Speed",
                     elem_classes="radio-group"
                 )
+                speed_mult = gr.Slider(
+                    1, 300, value=20, step=1,
+                    label="⏩ Accelerated Speed (N×)"
+                )
+                with gr.Row():
+                    seek_bar = gr.Number(
+                        label="⏩ Seek To Bar",
+                        value=0,
+                        precision=0,
+                        elem_classes="input-field"
+                    )
+                    seek_btn = gr.Button(
+                        "⏩ SEEK",
+                        elem_classes="secondary-btn"
+                    )
             with gr.Column(scale=2):
                 with gr.Row():
                     start = gr.Button(
@@ -589,6 +791,10 @@ with gr.Blocks(theme=gr.themes.Soft(), css=custom_css) as demo:
                         "⭐ AI AGENT SINGLE STEP", 
                         elem_classes="secondary-btn"
                     )
+                    kill = gr.Button(
+                        "🛑 KILL SWITCH",
+                        elem_classes="secondary-btn"
+                    )
         
         # Main Trading Interface
         with gr.Row():
@@ -611,14 +817,29 @@ with gr.Blocks(theme=gr.themes.Soft(), css=custom_css) as demo:
             elem_classes="logs-container"
         )
 
-        # background polling to keep UI fresh
+        # background polling to keep UI fresh; each viewer remembers what it was last sent
+        live_sent = gr.State({})
         poll = gr.Timer(1.0, active=True)
-        poll.tick(fn=fetch_live_state, outputs=[fig, port, logs])
+        poll.tick(fn=fetch_live_state, inputs=[live_sent], outputs=[fig, port, logs, live_sent])
+
+        # Append-only chart updates for external API clients (not applied by the dashboard plot): /chart_delta with the last cursor
+        delta_cursor = gr.JSON(visible=False)
+        chart_delta = gr.JSON(visible=False)
+        delta_btn = gr.Button(visible=False)
+        delta_btn.click(get_chart_delta, inputs=[delta_cursor], outputs=[chart_delta], api_name="chart_delta")
+
+        # Compact typed-column payload for lightweight renderers: /chart_compact with the last epoch seen
+        compact_epoch = gr.Number(visible=False)
+        chart_compact = gr.JSON(visible=False)
+        compact_btn = gr.Button(visible=False)
+        compact_btn.click(get_chart_compact, inputs=[compact_epoch], outputs=[chart_compact], api_name="chart_compact")
 
         # Event handlers - using AI agent methods
-        start.click(start_run, inputs=[speed], outputs=[logs])
+        start.click(start_run, inputs=[speed, speed_mult], outputs=[logs])
+        seek_btn.click(seek_run, inputs=[seek_bar], outputs=[logs])
         pause.click(pause_run, outputs=[logs])
         step.click(step_once, outputs=[fig, port, logs])
+        kill.click(toggle_kill_switch, outputs=[logs])
 
     with gr.Tab("📊 AI Analytics"):
         gr.Markdown("### 🧠 AI Agent Performance Analytics", elem_classes="sub-header")
@@ -667,11 +888,15 @@ with gr.Blocks(theme=gr.themes.Soft(), css=custom_css) as demo:
                 - Learning curve and adaptation metrics
                 """, elem_classes="analytics-card")
         
+        with gr.Accordion("⏱️ Step Latency by Stage (ms)", open=False, elem_classes="accordion"):
+            latency_json = gr.JSON(label="⏱️ p50 / p95 / p99 per stage")
+
         # Analytics event handlers
         refresh_analytics_btn.click(
             get_ai_analytics,
             outputs=[analytics_plot, stats_table, analytics_status, total_pnl_display]
         )
+        refresh_analytics_btn.click(get_latency_report, outputs=[latency_json], api_name="latency_report")
         
         # Auto-refresh analytics every 10 seconds
         analytics_timer = gr.Timer(10.0, active=True)
@@ -679,6 +904,7 @@ with gr.Blocks(theme=gr.themes.Soft(), css=custom_css) as demo:
             fn=get_ai_analytics,
             outputs=[analytics_plot, stats_table, analytics_status, total_pnl_display]
         )
+        analytics_timer.tick(fn=get_latency_report, outputs=[latency_json])
 
 if __name__ == "__main__":
     demo.launch()
\ No newline at end of file
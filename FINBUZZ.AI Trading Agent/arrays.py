@@ -0,0 +1,95 @@
+# arrays.py
+from __future__ import annotations
+from typing import Iterable
+import numpy as np
+
+
+class GrowableArray:
+    """
+    Append-optimized 1-D NumPy buffer.
+    Capacity doubles when full, so append is amortized O(1) and `view` is a
+    zero-copy slice of the filled part.
+    """
+    def __init__(self, dtype, capacity: int = 64, fill=0):
+        self.dtype = np.dtype(dtype)
+        self.fill = fill
+        self._data = np.full(max(int(capacity), 1), fill, dtype=self.dtype)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _index(self, idx):
+        # Scalar positions index the buffer directly (no slice view per access)
+        if isinstance(idx, (int, np.integer)):
+            i = int(idx)
+            if i < 0:
+                i += self._size
+            if not 0 <= i < self._size:
+                raise IndexError(f"index {idx} out of range for size {self._size}")
+            return i
+        return None
+
+    def __getitem__(self, idx):
+        i = self._index(idx)
+        return self.view[idx] if i is None else self._data[i]
+
+    def __setitem__(self, idx, value):
+        i = self._index(idx)
+        if i is None:
+            self.view[idx] = value
+        else:
+            self._data[i] = value
+
+    @property
+    def view(self) -> np.ndarray:
+        return self._data[:self._size]
+
+    @property
+    def nbytes(self) -> int:
+        return self._size * self.dtype.itemsize
+
+    def _reserve(self, n: int):
+        if n <= self._data.size:
+            return
+        cap = self._data.size
+        while cap < n:
+            cap *= 2
+        data = np.full(cap, self.fill, dtype=self.dtype)
+        data[:self._size] = self._data[:self._size]
+        self._data = data
+
+    def append(self, value):
+        if self._size == self._data.size:
+            self._reserve(self._size + 1)
+        self._data[self._size] = value
+        self._size += 1
+
+    def extend(self, values: Iterable):
+        arr = np.asarray(values, dtype=self.dtype)
+        n = arr.size
+        self._reserve(self._size + n)
+        self._data[self._size:self._size + n] = arr
+        self._size += n
+
+    def resize(self, n: int):
+        """Grow (padding with `fill`) or truncate to exactly n elements."""
+        self._reserve(n)
+        if n < self._size:
+            self._data[n:self._size] = self.fill
+        self._size = n
+
+    def clear(self):
+        self.resize(0)
+
+    def __getstate__(self):
+        # Pickle only the filled part
+        return {"dtype": self.dtype.str, "fill": self.fill, "data": self.view.copy()}
+
+    def __setstate__(self, state):
+        self.dtype = np.dtype(state["dtype"])
+        self.fill = state["fill"]
+        data = state["data"]
+        self._data = np.full(max(data.size, 1), self.fill, dtype=self.dtype)
+        self._data[:data.size] = data
+        self._size = data.size
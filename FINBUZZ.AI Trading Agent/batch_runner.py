@@ -0,0 +1,138 @@
+# batch_runner.py
+"""
+Headless batch evaluation of TraderAgent sessions (no Gradio, no Plotly figures).
+
+    python batch_runner.py HUDCO.NS IRFC.NS --cash 10000 --workers 4 --out results
+    python batch_runner.py --config sessions.json --out results
+
+`sessions.json` is a list of objects with the SessionConfig fields, e.g.
+    [{"ticker": "HUDCO.NS", "starting_cash": 10000}, {"ticker": "IRFC.NS", "use_llm": true}]
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import pandas as pd
+
+from trader_agent import TraderAgent
+
+
+@dataclass
+class SessionConfig:
+    ticker: str
+    starting_cash: float = 10000.0
+    use_llm: bool = False
+    model_name: str = "gpt-4o-mini"
+    label: str = ""
+
+    @property
+    def name(self) -> str:
+        return self.label or self.ticker.replace(".", "_")
+
+
+def run_session(config: SessionConfig, out_dir: Path, df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+    """Run one session to completion and write <out_dir>/<name>.json with summary and fills."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+
+    agent = TraderAgent(model_name=config.model_name, use_llm=config.use_llm, headless=True,
+                        journal_path=out_dir / "journal.sqlite", checkpoint_every=0)
+    if df is None:
+        agent.initialize(config.ticker, config.starting_cash)
+    else:
+        agent.initialize_from_df(config.ticker, df, config.starting_cash)
+
+    while not agent.step_once().get("done"):
+        pass
+    agent.journal.close()
+
+    state = agent.state
+    snap = agent.tool_portfolio_state()
+    summary = {
+        "name": config.name,
+        "ticker": config.ticker,
+        "session_id": state.session_id,
+        "use_llm": agent.use_llm,
+        "starting_cash": config.starting_cash,
+        "bars": state.stream.position,
+        "trades": len(state.portfolio.trade_log),
+        "win_rate": state.trading_memory.performance_metrics.get("win_rate", 0.0),
+        **snap,
+        "bottleneck_stage": state.latency.bottleneck(),
+        "elapsed_sec": round(time.perf_counter() - started, 3),
+    }
+    fills = [{"ts": f.ts, "side": f.side, "qty": f.qty, "price": f.price, "fees": f.fees}
+             for f in state.portfolio.trade_log]
+    (out_dir / f"{config.name}.json").write_text(json.dumps(
+        {"summary": summary, "fills": fills, "latency": state.latency.summary()}, indent=2, default=str
+    ))
+    return summary
+
+
+def _run_session_safe(config: SessionConfig, out_dir: Path) -> Dict[str, Any]:
+    try:
+        return run_session(config, out_dir)
+    except Exception as e:
+        return {"name": config.name, "ticker": config.ticker, "error": str(e)}
+
+
+def run_batch(configs: List[SessionConfig], out_dir: Path, workers: Optional[int] = None) -> pd.DataFrame:
+    """Run sessions in parallel worker processes; writes summary.json and summary.parquet."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    workers = workers or min(len(configs), os.cpu_count() or 1)
+
+    results: List[Dict[str, Any]] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_run_session_safe, cfg, out_dir): cfg for cfg in configs}
+        for fut in as_completed(futures):
+            res = fut.result()
+            results.append(res)
+            status = f"❌ {res['error']}" if "error" in res else f"PnL=₹{res.get('total_pnl', 0)} Trades={res.get('trades', 0)}"
+            print(f"[{len(results)}/{len(configs)}] {res['name']}: {status}")
+
+    summary = pd.DataFrame(results)
+    (out_dir / "summary.json").write_text(json.dumps(results, indent=2, default=str))
+    try:
+        summary.to_parquet(out_dir / "summary.parquet", index=False)
+    except ImportError:
+        # Parquet needs pyarrow or fastparquet; fall back to CSV on minimal installs
+        summary.to_csv(out_dir / "summary.csv", index=False)
+        print("pyarrow/fastparquet not installed - wrote summary.csv instead of parquet")
+    return summary
+
+
+def _load_configs(args: argparse.Namespace) -> List[SessionConfig]:
+    configs = []
+    if args.config:
+        for item in json.loads(Path(args.config).read_text()):
+            configs.append(SessionConfig(**item))
+    for ticker in args.tickers:
+        configs.append(SessionConfig(ticker=ticker, starting_cash=args.cash, use_llm=args.use_llm))
+    return configs
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run TraderAgent sessions headless in parallel.")
+    parser.add_argument("tickers", nargs="*", help="NSE tickers like HUDCO.NS")
+    parser.add_argument("--config", help="JSON file with a list of session configs")
+    parser.add_argument("--cash", type=float, default=10000.0, help="Starting cash per ticker session")
+    parser.add_argument("--use-llm", action="store_true", help="Use the LLM agent (default: deterministic policy)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--out", default="results", help="Output directory")
+    args = parser.parse_args(argv)
+
+    configs = _load_configs(args)
+    if not configs:
+        parser.error("Give at least one ticker or --config")
+    run_batch(configs, Path(args.out), args.workers)
+
+
+if __name__ == "__main__":
+    main()
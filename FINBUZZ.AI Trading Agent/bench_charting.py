@@ -0,0 +1,193 @@
+# bench_charting.py
+"""
+Scaling benchmark for the Candles chart path: init_context, append_live_candle,
+add_trade_marker and to_json on synthetic sessions of 100 to 50,000 bars.
+
+    python bench_charting.py
+    python bench_charting.py --sizes 100 1000 10000 --trades 0 0.05 --save bench/charting.json
+    python bench_charting.py --baseline bench/charting.json --tolerance 1.5
+
+Reports time per append (candle + markers), time per poll (to_json encode),
+payload bytes (figure JSON and compact payload) and tracemalloc peak, then
+exits non-zero when a threshold is exceeded. Per-append time must stay flat as
+sessions grow (`--max-growth`), so accidental O(n) work per bar shows up as a
+failure rather than a slow dashboard.
+"""
+from __future__ import annotations
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+import orjson
+import pandas as pd
+
+from charting import Candles
+
+
+CONTEXT_BARS = 75
+METRICS = ("append_us", "poll_ms", "payload_bytes", "peak_mb")
+
+
+def synthetic_session(n_bars: int, seed: int = 0) -> pd.DataFrame:
+    """Context day plus n_bars of 5-minute OHLCV random walk (IST)."""
+    rng = np.random.default_rng(seed)
+    n = CONTEXT_BARS + n_bars
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.002, n)))
+    open_ = np.r_[100.0, close[:-1]]
+    wick = np.abs(rng.normal(0.0, 0.001, (2, n))) * close
+    index = pd.date_range("2026-01-05 09:15", periods=n, freq="5min", tz="Asia/Kolkata")
+    return pd.DataFrame({
+        "Open": open_.round(2), "High": (np.maximum(open_, close) + wick[0]).round(2),
+        "Low": (np.minimum(open_, close) - wick[1]).round(2), "Close": close.round(2),
+        "Volume": rng.integers(1_000, 50_000, n).astype(np.float64),
+    }, index=index)
+
+
+def run_case(df: pd.DataFrame, trade_frac: float, viewport: Optional[int], polls: int) -> Dict[str, Any]:
+    """Stream the trading bars of `df` into a fresh chart, polling to_json `polls` times."""
+    context, bars = df.iloc[:CONTEXT_BARS], df.iloc[CONTEXT_BARS:]
+    n = len(bars)
+    times = list(bars.index)
+    o, h, l, c = (bars[col].tolist() for col in ("Open", "High", "Low", "Close"))
+    trade_every = max(int(round(1 / trade_frac)), 1) if trade_frac > 0 else 0
+    poll_at = set(np.linspace(1, n, min(polls, n)).astype(int).tolist())
+
+    chart = Candles(viewport_bars=viewport)
+    started = time.perf_counter_ns()
+    chart.init_context(context)
+    init_ns = time.perf_counter_ns() - started
+
+    append_ns = poll_ns = 0
+    trades = 0
+    payload = ""
+    for i in range(n):
+        started = time.perf_counter_ns()
+        chart.append_live_candle(times[i], o[i], c[i], h[i], l[i])
+        if trade_every and i % trade_every == 0:
+            chart.add_trade_marker(times[i], c[i], "BUY" if trades % 2 == 0 else "SELL")
+            trades += 1
+        append_ns += time.perf_counter_ns() - started
+        if i + 1 in poll_at:
+            started = time.perf_counter_ns()
+            payload = chart.to_json().to_json()
+            poll_ns += time.perf_counter_ns() - started
+    return {
+        "bars": n,
+        "trades": trades,
+        "init_ms": round(init_ns / 1e6, 3),
+        "append_us": round(append_ns / n / 1e3, 3),
+        "poll_ms": round(poll_ns / max(len(poll_at), 1) / 1e6, 3),
+        "payload_bytes": len(payload),
+        "compact_bytes": len(orjson.dumps(chart.compact_payload())),
+    }
+
+
+def peak_memory_mb(df: pd.DataFrame, trade_frac: float, viewport: Optional[int], polls: int) -> float:
+    """tracemalloc peak of a whole case (run separately: tracing slows the timed run)."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run_case(df, trade_frac, viewport, polls)
+        return round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 3)
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmark(sizes: List[int], trade_fracs: List[float], viewport: Optional[int], polls: int,
+                  seed: int = 0) -> List[Dict[str, Any]]:
+    rows = []
+    for mode, vp in (("full", None), ("viewport", viewport)):
+        if mode == "viewport" and not vp:
+            continue
+        for size in sizes:
+            df = synthetic_session(size, seed)
+            for frac in trade_fracs:
+                row = {"mode": mode, "trade_frac": frac, **run_case(df, frac, vp, polls)}
+                row["peak_mb"] = peak_memory_mb(df, frac, vp, polls)
+                rows.append(row)
+                print(f"📈 {mode:8s} bars={row['bars']:>6} trades={row['trades']:>5} | "
+                      f"append {row['append_us']:8.2f}µs | poll {row['poll_ms']:8.2f}ms | "
+                      f"payload {row['payload_bytes'] / 1024:9.1f}KB (compact {row['compact_bytes'] / 1024:7.1f}KB) | "
+                      f"peak {row['peak_mb']:7.2f}MB")
+    return rows
+
+
+def _key(row: Dict[str, Any]) -> str:
+    return f"{row['mode']}/{row['bars']}/{row['trade_frac']}"
+
+
+def check(rows: List[Dict[str, Any]], args, baseline: Optional[List[Dict[str, Any]]] = None) -> List[str]:
+    """Threshold and regression violations (empty when everything passes)."""
+    failures = []
+    for row in rows:
+        if row["append_us"] > args.max_append_us:
+            failures.append(f"{_key(row)}: append {row['append_us']}µs > {args.max_append_us}µs")
+        if row["peak_mb"] > args.max_peak_mb:
+            failures.append(f"{_key(row)}: peak {row['peak_mb']}MB > {args.max_peak_mb}MB")
+        if row["mode"] == "viewport" and row["payload_bytes"] > args.max_viewport_kb * 1024:
+            failures.append(f"{_key(row)}: viewport payload {row['payload_bytes'] / 1024:.1f}KB > {args.max_viewport_kb}KB")
+
+    # Per-append cost must not grow with session length
+    for mode in {row["mode"] for row in rows}:
+        for frac in {row["trade_frac"] for row in rows}:
+            series = sorted((r for r in rows if r["mode"] == mode and r["trade_frac"] == frac), key=lambda r: r["bars"])
+            if len(series) > 1 and series[0]["append_us"] > 0:
+                growth = series[-1]["append_us"] / series[0]["append_us"]
+                if growth > args.max_growth:
+                    failures.append(f"{mode}/{frac}: append time grew {growth:.1f}x from {series[0]['bars']} "
+                                    f"to {series[-1]['bars']} bars (> {args.max_growth}x)")
+
+    if baseline:
+        previous = {_key(row): row for row in baseline}
+        for row in rows:
+            base = previous.get(_key(row))
+            if base is None:
+                continue
+            for metric in METRICS:
+                # Absolute slack keeps sub-microsecond noise from failing tiny cases
+                slack = {"append_us": 1.0, "poll_ms": 0.5, "payload_bytes": 0, "peak_mb": 0.5}[metric]
+                if row[metric] > base[metric] * args.tolerance + slack:
+                    failures.append(f"{_key(row)}: {metric} {row[metric]} regressed from {base[metric]} "
+                                    f"(> {args.tolerance}x)")
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark how the Candles chart path scales with session length.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000], help="Trading bars per session")
+    parser.add_argument("--trades", type=float, nargs="+", default=[0.0, 0.02, 0.1],
+                        help="Fills per bar (fractions of the bar count)")
+    parser.add_argument("--viewport", type=int, default=300, help="Viewport bars for the viewport mode (0 skips it)")
+    parser.add_argument("--polls", type=int, default=20, help="to_json polls per session")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-append-us", type=float, default=50.0, help="Max mean time per bar append")
+    parser.add_argument("--max-growth", type=float, default=3.0, help="Max per-append slowdown from smallest to largest size")
+    parser.add_argument("--max-viewport-kb", type=float, default=512.0, help="Max viewport-mode payload")
+    parser.add_argument("--max-peak-mb", type=float, default=512.0, help="Max tracemalloc peak per session")
+    parser.add_argument("--baseline", help="Results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="Allowed ratio over the baseline")
+    parser.add_argument("--save", help="Write results JSON here")
+    args = parser.parse_args(argv)
+
+    rows = run_benchmark(sorted(args.sizes), args.trades, args.viewport or None, args.polls, args.seed)
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    if args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save).write_text(json.dumps(rows, indent=2))
+
+    failures = check(rows, args, baseline)
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        return 1
+    print(f"✅ {len(rows)} chart benchmark cases within thresholds")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
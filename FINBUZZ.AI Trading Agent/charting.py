@@ -1,274 +1,858 @@
 # charting.py
 from __future__ import annotations
+import base64
+import itertools
+import threading
+import zlib
+from collections import deque
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+import orjson
 import pandas as pd
 import plotly.graph_objects as go
 
+from arrays import GrowableArray
+
+
+LIVE_STYLE = dict(
+    name="Live Trading",
+    increasing_line_color='#00ffff',
+    decreasing_line_color='#ff6600',
+    increasing_fillcolor='rgba(0, 255, 255, 0.7)',
+    decreasing_fillcolor='rgba(255, 102, 0, 0.7)',
+    line=dict(width=2),
+    whiskerwidth=0.8,
+    opacity=0.9,
+    showlegend=False
+)
+
+
+VOLUME = "Volume"
+
+COMPACT_FORMAT = "finbuzz.candles.v1"
+PRICE_TICK = 0.01
+_INT32_NULL = np.iinfo(np.int32).min
+
+# Chart epochs are unique per process, so a viewer's cursor never matches a replaced chart
+_EPOCHS = itertools.count(1)
+
+
+def _marker_traces(side: str, symbol: str, color: str, textposition: str):
+    """Pre-styled (marker, glow) traces that hold every fill of one side."""
+    marker = go.Scatter(
+        x=[], y=[],
+        mode="markers+text",
+        marker=dict(
+            symbol=symbol,
+            size=20,
+            color=color,
+            line=dict(width=3, color="white"),
+            opacity=0.9
+        ),
+        texttemplate=side,
+        textposition=textposition,
+        textfont=dict(
+            size=10,
+            color=color,
+            family="JetBrains Mono"
+        ),
+        name=f"{side.title()} Signal",
+        showlegend=False,
+        hovertemplate=f"<b>{side} ORDER</b><br>" +
+                    "Time: %{x}<br>" +
+                    "Price: ₹%{y:.2f}<br>" +
+                    "<extra></extra>"
+    )
+    # Subtle glow effect
+    glow = go.Scatter(
+        x=[], y=[],
+        mode="markers",
+        marker=dict(
+            symbol=symbol,
+            size=35,
+            color=color,
+            opacity=0.3
+        ),
+        showlegend=False,
+        hoverinfo='skip'
+    )
+    return marker, glow
+
+
+def _with_candles(trace: Dict, t: np.ndarray, o, h, l, c) -> Dict:
+    """Copy of a candlestick trace dict holding the given columns (x as epoch ms)."""
+    return dict(trace, x=t // 1_000_000, open=o, high=h, low=l, close=c)
+
+
+class ChartPayload:
+    """
+    Figure JSON for one chart version. gr.Plot accepts any object with
+    `to_json()`, so every viewer polling the same version shares one instance;
+    the JSON is encoded on first use and then reused. With `latency`, the
+    encode is recorded as its "figure" stage.
+    """
+    def __init__(self, key, build: Callable[[], str], latency=None):
+        self.key = key
+        self._build = build
+        self._latency = latency
+        self._json: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def to_json(self) -> str:
+        if self._json is None:
+            with self._lock:
+                if self._json is None:
+                    with self._latency.span("figure") if self._latency is not None else nullcontext():
+                        self._json = self._build()
+                    self._build = None
+        return self._json
+
+
+def _pack_columns(columns: Dict[str, Tuple[np.ndarray, float]]) -> Dict:
+    """
+    Compact columnar encoding: each column is quantized to little-endian int32
+    (value / scale, NaN -> INT32_MIN), delta-encoded when it has no gaps, and
+    all columns are deflated into one base64 block.
+    """
+    meta, chunks, offset = {}, [], 0
+    for name, (values, scale) in columns.items():
+        values = np.asarray(values, dtype=np.float64)
+        finite = np.isfinite(values)
+        q = np.full(values.shape, _INT32_NULL, dtype=np.int64)
+        q[finite] = np.rint(values[finite] / scale)
+        delta = bool(finite.all()) and len(q) > 1
+        if delta:
+            q = np.diff(q, prepend=0)
+        q = q.astype("<i4")
+        meta[name] = {"dtype": "i4", "offset": offset, "length": len(q), "scale": scale, "delta": delta}
+        chunks.append(q.tobytes())
+        offset += q.nbytes
+    return {"columns": meta, "data": base64.b64encode(zlib.compress(b"".join(chunks), 6)).decode("ascii")}
+
+
+def _wall_ns(ts) -> int:
+    """Exchange wall-clock time as naive epoch ns (what Plotly displays for tz-aware stamps)."""
+    ts = pd.Timestamp(ts)
+    return (ts.tz_localize(None) if ts.tzinfo is not None else ts).value
+
+
+def _bar_range(df: pd.DataFrame, opens: np.ndarray, closes: np.ndarray):
+    """(highs, lows) from High/Low columns, or the Open/Close body when a source lacks them."""
+    if "High" in df.columns and "Low" in df.columns:
+        return df["High"].to_numpy(dtype=np.float64), df["Low"].to_numpy(dtype=np.float64)
+    return np.maximum(opens, closes), np.minimum(opens, closes)
+
+
+class WindowExtrema:
+    """
+    Lowest low and highest high over the last `window` bars (every bar when
+    None). Windowed extrema use monotonic deques, so each push is O(1)
+    amortized and reading the range is O(1).
+    """
+    def __init__(self, window: Optional[int] = None):
+        self.window = window
+        self.clear()
+
+    def clear(self):
+        self._n = 0
+        self._lows: deque = deque()   # (bar, low), lows increasing
+        self._highs: deque = deque()  # (bar, high), highs decreasing
+        self._low, self._high = np.inf, -np.inf
+
+    def push(self, low: float, high: float):
+        if self.window is None:
+            self._low = min(self._low, low)
+            self._high = max(self._high, high)
+            return
+        i, oldest = self._n, self._n - self.window
+        self._n += 1
+        lows, highs = self._lows, self._highs
+        while lows and lows[-1][1] >= low:
+            lows.pop()
+        lows.append((i, low))
+        while highs and highs[-1][1] <= high:
+            highs.pop()
+        highs.append((i, high))
+        while lows[0][0] <= oldest:
+            lows.popleft()
+        while highs[0][0] <= oldest:
+            highs.popleft()
+
+    def extend_last(self, low: float, high: float):
+        """Widen the most recent bar's range (e.g. by an overlay value drawn on it)."""
+        if self.window is None or not self._n:
+            self.push(low, high)
+            return
+        i = self._n - 1
+        lows, highs = self._lows, self._highs
+        while lows and lows[-1][1] >= low:
+            lows.pop()
+        lows.append((i, low))
+        while highs and highs[-1][1] <= high:
+            highs.pop()
+        highs.append((i, high))
+
+    @property
+    def low(self) -> float:
+        return self._lows[0][1] if self.window is not None and self._lows else self._low
+
+    @property
+    def high(self) -> float:
+        return self._highs[0][1] if self.window is not None and self._highs else self._high
+
+
+class OhlcBuckets:
+    """
+    Older bars aggregated into at most `max_buckets` OHLC candles. Each bucket
+    spans `width` bars; when the buckets are full, neighbouring pairs merge and
+    the width doubles, so `add` is O(1) amortized and the output never exceeds
+    `max_buckets` candles however many bars arrive.
+    """
+    def __init__(self, max_buckets: int = 500):
+        self.max_buckets = max(2, max_buckets - max_buckets % 2)
+        self._t = GrowableArray(np.int64)
+        self._o = GrowableArray(np.float64)
+        self._h = GrowableArray(np.float64)
+        self._l = GrowableArray(np.float64)
+        self._c = GrowableArray(np.float64)
+        self._n = GrowableArray(np.int64)  # bars in each bucket
+        self.clear()
+
+    def clear(self):
+        for col in (self._t, self._o, self._h, self._l, self._c, self._n):
+            col.clear()
+        self.width = 1
+        self.bars = 0
+
+    def __len__(self) -> int:
+        return len(self._t)
+
+    def add(self, t: int, o: float, h: float, l: float, c: float):
+        self.bars += 1
+        last = len(self._t) - 1
+        if last >= 0 and self._n[last] < self.width:
+            self._h[last] = max(self._h[last], h)
+            self._l[last] = min(self._l[last], l)
+            self._c[last] = c
+            self._n[last] += 1
+            return
+        if last + 1 == self.max_buckets:
+            self._merge_pairs()
+        for col, value in ((self._t, t), (self._o, o), (self._h, h), (self._l, l), (self._c, c), (self._n, 1)):
+            col.append(value)
+
+    def _merge_pairs(self):
+        half = len(self._t) // 2
+        for col, merged in ((self._t, self._t.view[0::2]), (self._o, self._o.view[0::2]),
+                            (self._h, np.maximum(self._h.view[0::2], self._h.view[1::2])),
+                            (self._l, np.minimum(self._l.view[0::2], self._l.view[1::2])),
+                            (self._c, self._c.view[1::2]),
+                            (self._n, self._n.view[0::2] + self._n.view[1::2])):
+            merged = merged.copy()
+            col.resize(half)
+            col[:] = merged
+        self.width *= 2
+
+    def columns(self):
+        """(t, o, h, l, c) views of the buckets."""
+        return self._t.view, self._o.view, self._h.view, self._l.view, self._c.view
+
 
 class Candles:
-    def __init__(self):
+    """
+    Plotly candlestick chart. Live bars are kept in growable NumPy columns and
+    shown as one candlestick trace, so an append is O(1) and the figure holds a
+    single live trace however long the session runs. Trade markers work the
+    same way: all BUY fills share one marker trace (plus its glow layer) and
+    all SELL fills another, so the trace count never grows with the session.
+    Volume bars (in a subplot) and indicator overlays are streamed into one
+    fixed trace per series as well.
+
+    The y-range is tracked incrementally (`WindowExtrema`). With `viewport_bars`
+    set, the chart switches to viewport mode: the axes follow the most recent
+    bars, which are sent at full resolution, while the context and every older
+    live bar are aggregated into at most `history_buckets` OHLC candles
+    (`OhlcBuckets`) and older trade markers are thinned to the same cap, so the
+    payload stays bounded for multi-day sessions.
+
+    Every change bumps `version`; `init_context` (and restoring a checkpoint)
+    starts a new `epoch`. Pollers compare (epoch, version) to skip unchanged
+    charts, and `delta_since` serves just the candles and markers appended
+    after a client's cursor.
+
+    `to_json` never runs Plotly's validators on the hot path: the styled figure
+    is encoded once per layout change, and each version's payload splices the
+    column arrays into it with orjson (`ChartPayload`).
+    """
+    def __init__(self, viewport_bars: Optional[int] = None, history_buckets: int = 500):
         self.fig = go.Figure()
+        self.viewport_bars = viewport_bars
+        self.history_buckets = history_buckets
+        self._history = OhlcBuckets(history_buckets) if viewport_bars else None
+        self._live_idx = None
+        self._t = GrowableArray(np.int64)  # wall-clock epoch ns
+        self._o = GrowableArray(np.float64)
+        self._h = GrowableArray(np.float64)
+        self._l = GrowableArray(np.float64)
+        self._c = GrowableArray(np.float64)
+        # side -> (wall-clock ns, price) of every fill
+        self._marks = {side: (GrowableArray(np.int64), GrowableArray(np.float64)) for side in ("BUY", "SELL")}
+        # Volume and indicator overlays: name -> (wall-clock ns, value) columns and trace index
+        self._series: Dict[str, Tuple[GrowableArray, GrowableArray]] = {}
+        self._series_idx: Dict[str, int] = {}
+        self._vol_palette: List[str] = []
+        self._vol_color = GrowableArray(np.int16)  # palette index per volume bar
+        self._ctx_t = np.empty(0, dtype=np.int64)
+        self._ctx_ohlc = (np.empty(0), np.empty(0), np.empty(0), np.empty(0))
+        self._range = WindowExtrema(viewport_bars)
+        self.epoch = next(_EPOCHS)
+        self.version = 0
+        self._static: Optional[Dict] = None  # figure JSON without stream data
+        self._payload: Optional[ChartPayload] = None
+        self._compact: Optional[Tuple[Tuple[int, int], Dict]] = None
+        self._lock = threading.Lock()
+        self.latency = None  # StageLatency of the owning session (times figure encodes)
+
+    def __getstate__(self):
+        # Pickled in session checkpoints: plain figure dict (the stream traces
+        # in it stay empty; their data lives in the columns), no caches or locks.
+        state = {k: v for k, v in self.__dict__.items()
+                 if k not in ("fig", "_static", "_payload", "_compact", "_lock", "latency")}
+        state["fig"] = self.fig.to_plotly_json()
+        return state
+
+    def __setstate__(self, state):
+        fig = state.pop("fig")
+        # Plotly encodes numeric arrays as base64 typed arrays; decode them so
+        # a restored chart can keep appending and computing ranges.
+        for trace in fig.get("data", []):
+            for key, val in list(trace.items()):
+                if isinstance(val, dict) and "bdata" in val:
+                    trace[key] = np.frombuffer(base64.b64decode(val["bdata"]), dtype=val["dtype"])
+        self.__dict__.update(state)
+        self.fig = go.Figure(fig)
+        self._static = None
+        self._payload = None
+        self._compact = None
+        self._lock = threading.Lock()
+        self.latency = None
+        self.epoch = next(_EPOCHS)
+
+    def _touch(self):
+        self.version += 1
+
+    @property
+    def live_bars(self) -> int:
+        return len(self._t)
+
+    def _static_json(self) -> Dict:
+        """The figure without stream data, through Plotly's encoder once per layout change."""
+        if self._static is None:
+            if self._live_idx is None:
+                self._add_stream_traces()
+            self._static = orjson.loads(self.fig.to_json())
+        return self._static
+
+    def _encode(self) -> str:
+        """Figure JSON: the cached static part plus the stream traces and ranges straight from the columns."""
+        # Runs on the poll thread: take the static figure and its trace indices
+        # together, while the runner may be adding a series
+        with self._lock:
+            static = self._static_json()
+            series_idx = dict(self._series_idx)
+            i = self._live_idx
+            n = len(self._c)  # the column each append writes last
+        data, layout = list(static["data"]), dict(static["layout"])
+        # Viewport mode sends only the recent window of live bars at full resolution
+        first = max(n - self.viewport_bars, 0) if self._history is not None else 0
+        data[i] = _with_candles(data[i], self._t.view[first:n], self._o.view[first:n], self._h.view[first:n],
+                                self._l.view[first:n], self._c.view[first:n])
+        for k, side in enumerate(("BUY", "SELL")):
+            x, y = self._marker_columns(side, first, n)
+            for j in (i + 1 + 2 * k, i + 2 + 2 * k):
+                data[j] = dict(data[j], x=x, y=y)
+        if self._history is not None and i:
+            data[0] = _with_candles(data[0], *self._history.columns())
+        for name, j in series_idx.items():
+            x, y, start, m = self._series_columns(name, first)
+            data[j] = dict(data[j], x=x, y=y)
+            if name == VOLUME:
+                data[j]["marker"] = dict(data[j].get("marker", {}), color=self._vol_color.view[start:m],
+                                         colorscale=self._volume_colorscale(), cmin=0,
+                                         cmax=max(len(self._vol_palette) - 1, 1))
+        # Update y-axis range dynamically for better visualization
+        if n:
+            y_min, y_max = self._range.low, self._range.high
+            y_range = y_max - y_min
+            layout["yaxis"] = dict(layout.get("yaxis", {}), range=[y_min - y_range * 0.03, y_max + y_range * 0.03])
+            if self.viewport_bars and n + len(self._ctx_t) > self.viewport_bars:
+                layout["xaxis"] = dict(layout.get("xaxis", {}), range=self._latest_window(n))
+        return orjson.dumps({"data": data, "layout": layout}, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+    def _marker_columns(self, side: str, first: int, n: int):
+        """Marker (x ms, y) arrays; in viewport mode markers before live bar `first` are thinned to the history cap."""
+        t, y = self._marks[side]
+        m = len(y)
+        t, y = t.view[:m], y.view[:m]
+        if first and m > self.history_buckets:
+            older = int(np.searchsorted(t, self._t[first]))
+            if older > self.history_buckets:
+                keep = np.r_[np.linspace(0, older - 1, self.history_buckets).astype(np.int64), older:m]
+                t, y = t[keep], y[keep]
+        return t // 1_000_000, y
+
+    def _series_columns(self, name: str, first: int):
+        """(x ms, y, start, end) of a series, from live bar `first` on."""
+        t, y = self._series[name]
+        m = len(y)
+        start = int(np.searchsorted(t.view[:m], self._t[first])) if first else 0
+        return t.view[start:m] // 1_000_000, y.view[start:m], start, m
+
+    def _volume_colorscale(self):
+        palette = self._vol_palette or ['rgba(100, 100, 100, 0.5)']
+        if len(palette) == 1:
+            return [[0.0, palette[0]], [1.0, palette[0]]]
+        return [[k / (len(palette) - 1), color] for k, color in enumerate(palette)]
+
+    def _add_series(self, name: str, trace, **layout):
+        """Fixed trace for one streamed series (created on its first point), plus any layout it needs."""
+        # Under the lock: encoders snapshot the static figure and trace indices together
+        with self._lock:
+            if layout:
+                self.fig.update_layout(**layout)
+            self.fig.add_trace(trace)
+            self._series[name] = (GrowableArray(np.int64), GrowableArray(np.float64))
+            self._series_idx[name] = len(self.fig.data) - 1
+            self._static = None
+
+    def _add_stream_traces(self):
+        """The single live candlestick trace, then BUY and SELL (marker, glow) pairs."""
+        self.fig.add_candlestick(x=[], open=[], high=[], low=[], close=[], **LIVE_STYLE)
+        self._live_idx = len(self.fig.data) - 1
+        self.fig.add_traces([*_marker_traces("BUY", "triangle-up", "lime", "top center"),
+                             *_marker_traces("SELL", "triangle-down", "red", "bottom center")])
+        # Stream x values are sent as epoch ms
+        self.fig.update_xaxes(type="date")
+
+    def _latest_window(self, n: int):
+        """x-range of the last `viewport_bars` bars (context included while live bars are few)."""
+        window = self.viewport_bars
+        if n >= window:
+            start = self._t[n - window]
+        elif len(self._ctx_t):
+            start = self._ctx_t[max(len(self._ctx_t) - (window - n), 0)]
+        else:
+            start = self._t[0]
+        return np.datetime_as_string(np.array([start, self._t[n - 1]], dtype="datetime64[ns]"), unit="s").tolist()
 
     def init_context(self, context_df: pd.DataFrame):
-        # Enhanced premium candlestick styling
-        self.fig = go.Figure(data=[go.Candlestick(
-            x=context_df.index,
-            open=context_df["Open"],
-            high=context_df["Open"].combine(context_df["Close"], max),
-            low=context_df["Open"].combine(context_df["Close"], min),
-            close=context_df["Close"],
-            name="Context (Historical)",
-            increasing_line_color='#00ff88',      # Bright green
-            decreasing_line_color='#ff4444',      # Bright red
-            increasing_fillcolor='rgba(0, 255, 136, 0.8)',
-            decreasing_fillcolor='rgba(255, 68, 68, 0.8)',
-            line=dict(width=2),
-            whiskerwidth=0.8,
-            opacity=0.9
-        )])
+        # Rebuilds the figure: held under the lock so a concurrent encode never sees it half-built
+        with self._lock:
+            opens = context_df["Open"].to_numpy(dtype=np.float64)
+            closes = context_df["Close"].to_numpy(dtype=np.float64)
+            highs, lows = _bar_range(context_df, opens, closes)
+            # Enhanced premium candlestick styling
+            for col in (self._t, self._o, self._h, self._l, self._c, *self._marks["BUY"], *self._marks["SELL"]):
+                col.clear()
+            self._range.clear()
+            self._series, self._series_idx = {}, {}
+            self._vol_palette = []
+            self._vol_color.clear()
+            self._ctx_t = np.fromiter((_wall_ns(ts) for ts in context_df.index), dtype=np.int64, count=len(context_df))
+            self._ctx_ohlc = (opens, highs, lows, closes)
+            x, shown = context_df.index, (opens, highs, lows, closes)
+            if self._history is not None:
+                # Viewport mode: the context trace shows the bucketed history
+                self._history.clear()
+                for bar in zip(self._ctx_t, opens, highs, lows, closes):
+                    self._history.add(*bar)
+                t, *shown = self._history.columns()
+                x = t.view("datetime64[ns]")
+            self.fig = go.Figure(data=[go.Candlestick(
+                x=x,
+                open=shown[0],
+                high=shown[1],
+                low=shown[2],
+                close=shown[3],
+                name="Context (Historical)",
+                increasing_line_color='#00ff88',      # Bright green
+                decreasing_line_color='#ff4444',      # Bright red
+                increasing_fillcolor='rgba(0, 255, 136, 0.8)',
+                decreasing_fillcolor='rgba(255, 68, 68, 0.8)',
+                line=dict(width=2),
+                whiskerwidth=0.8,
+                opacity=0.9
+            )])
         
-        # Premium dark theme with enhanced styling
-        self.fig.update_layout(
-            title=dict(
-                text="🚀 AI Trading Agent - Premium Market Analysis",
-                font=dict(size=20, color='#00ff88', family='JetBrains Mono'),
-                x=0.5
-            ),
-            margin=dict(l=60, r=60, t=80, b=60),
-            height=600,
-            xaxis_title=dict(
-                text="⏰ Time (IST)",
-                font=dict(size=14, color='#ffffff', family='JetBrains Mono')
-            ),
-            yaxis_title=dict(
-                text="💰 Price (₹)",
-                font=dict(size=14, color='#ffffff', family='JetBrains Mono')
-            ),
-            xaxis_rangeslider_visible=False,
-            template="plotly_dark",
-            paper_bgcolor='#0a0a0a',
-            plot_bgcolor='#1a1a1a',
-            font=dict(
-                family="JetBrains Mono",
-                size=12,
-                color="#ffffff"
-            ),
-            xaxis=dict(
-                gridcolor='#333333',
-                gridwidth=1,
-                color='#ffffff',
-                showgrid=True,
-                zeroline=False,
-                tickfont=dict(size=10, color='#cccccc')
-            ),
-            yaxis=dict(
-                gridcolor='#333333',
-                gridwidth=1,
-                color='#ffffff',
-                showgrid=True,
-                zeroline=False,
-                tickfont=dict(size=10, color='#cccccc'),
-                tickformat=".2f"
-            ),
-            legend=dict(
-                bgcolor='rgba(26, 26, 26, 0.9)',
-                bordercolor='#00ff88',
-                borderwidth=1,
-                font=dict(color='#ffffff', size=12),
-                x=0.02,
-                y=0.98
-            ),
-            hovermode='x unified',
-            hoverlabel=dict(
-                bgcolor='rgba(0, 0, 0, 0.8)',
-                bordercolor='#00ff88',
-                font=dict(size=12, color='white', family='JetBrains Mono')
+            # Premium dark theme with enhanced styling
+            self.fig.update_layout(
+                title=dict(
+                    text="🚀 AI Trading Agent - Premium Market Analysis",
+                    font=dict(size=20, color='#00ff88', family='JetBrains Mono'),
+                    x=0.5
+                ),
+                margin=dict(l=60, r=60, t=80, b=60),
+                height=600,
+                xaxis_title=dict(
+                    text="⏰ Time (IST)",
+                    font=dict(size=14, color='#ffffff', family='JetBrains Mono')
+                ),
+                yaxis_title=dict(
+                    text="💰 Price (₹)",
+                    font=dict(size=14, color='#ffffff', family='JetBrains Mono')
+                ),
+                xaxis_rangeslider_visible=False,
+                template="plotly_dark",
+                paper_bgcolor='#0a0a0a',
+                plot_bgcolor='#1a1a1a',
+                font=dict(
+                    family="JetBrains Mono",
+                    size=12,
+                    color="#ffffff"
+                ),
+                xaxis=dict(
+                    gridcolor='#333333',
+                    gridwidth=1,
+                    color='#ffffff',
+                    showgrid=True,
+                    zeroline=False,
+                    tickfont=dict(size=10, color='#cccccc')
+                ),
+                yaxis=dict(
+                    gridcolor='#333333',
+                    gridwidth=1,
+                    color='#ffffff',
+                    showgrid=True,
+                    zeroline=False,
+                    tickfont=dict(size=10, color='#cccccc'),
+                    tickformat=".2f"
+                ),
+                legend=dict(
+                    bgcolor='rgba(26, 26, 26, 0.9)',
+                    bordercolor='#00ff88',
+                    borderwidth=1,
+                    font=dict(color='#ffffff', size=12),
+                    x=0.02,
+                    y=0.98
+                ),
+                hovermode='x unified',
+                hoverlabel=dict(
+                    bgcolor='rgba(0, 0, 0, 0.8)',
+                    bordercolor='#00ff88',
+                    font=dict(size=12, color='white', family='JetBrains Mono')
+                )
             )
-        )
-        
-        # Add enhanced grid and styling
-        self.fig.update_xaxes(
-            showspikes=True,
-            spikecolor="#00ff88",
-            spikesnap="cursor",
-            spikemode="across",
-            spikethickness=1
-        )
         
-        self.fig.update_yaxes(
-            showspikes=True,
-            spikecolor="#00ff88",
-            spikesnap="cursor",
-            spikemode="across",
-            spikethickness=1
-        )
-        
-        # Set initial zoom to show data properly with padding
-        if not context_df.empty:
-            y_min = context_df[["Open", "Close"]].min().min()
-            y_max = context_df[["Open", "Close"]].max().max()
-            y_range = y_max - y_min
-            self.fig.update_yaxes(
-                range=[y_min - y_range * 0.05, y_max + y_range * 0.05]
+            # Add enhanced grid and styling
+            self.fig.update_xaxes(
+                showspikes=True,
+                spikecolor="#00ff88",
+                spikesnap="cursor",
+                spikemode="across",
+                spikethickness=1
             )
-
-    def append_live_candle(self, ts, o, c):
-        # Enhanced live candles with premium styling
-        high_val = max(o, c)
-        low_val = min(o, c)
-        
-        # Determine color based on price movement
-        is_bullish = c > o
-        candle_color = '#00ffff' if is_bullish else '#ff6600'
-        fill_color = 'rgba(0, 255, 255, 0.7)' if is_bullish else 'rgba(255, 102, 0, 0.7)'
         
-        self.fig.add_candlestick(
-            x=[ts],
-            open=[o],
-            high=[high_val],
-            low=[low_val],
-            close=[c],
-            name="Live Trading",
-            increasing_line_color='#00ffff',
-            decreasing_line_color='#ff6600',
-            increasing_fillcolor='rgba(0, 255, 255, 0.7)',
-            decreasing_fillcolor='rgba(255, 102, 0, 0.7)',
-            line=dict(width=2),
-            whiskerwidth=0.8,
-            opacity=0.9,
-            showlegend=False
-        )
-        
-        # Update y-axis range dynamically for better visualization
-        current_data = self.fig.data
-        all_highs = []
-        all_lows = []
-        
-        for trace in current_data:
-            if hasattr(trace, 'high') and trace.high is not None:
-                all_highs.extend([h for h in trace.high if h is not None])
-            if hasattr(trace, 'low') and trace.low is not None:
-                all_lows.extend([l for l in trace.low if l is not None])
-        
-        if all_highs and all_lows:
-            y_min = min(all_lows)
-            y_max = max(all_highs)
-            y_range = y_max - y_min
             self.fig.update_yaxes(
-                range=[y_min - y_range * 0.03, y_max + y_range * 0.03]
+                showspikes=True,
+                spikecolor="#00ff88",
+                spikesnap="cursor",
+                spikemode="across",
+                spikethickness=1
             )
+        
+            # Set initial zoom to show data properly with padding
+            if not context_df.empty:
+                if self.viewport_bars:
+                    for lo, hi in zip(lows[-self.viewport_bars:], highs[-self.viewport_bars:]):
+                        self._range.push(float(lo), float(hi))
+                else:
+                    self._range.push(float(lows.min()), float(highs.max()))
+                y_min, y_max = self._range.low, self._range.high
+                y_range = y_max - y_min
+                self.fig.update_yaxes(
+                    range=[y_min - y_range * 0.05, y_max + y_range * 0.05]
+                )
+
+            # One live trace and fixed marker traces for the whole session, filled from the columns
+            self._add_stream_traces()
+            self._static = None
+            self.epoch = next(_EPOCHS)
+            self.version += 1
+
+    def append_live_candle(self, ts, o, c, h=None, l=None):
+        # Extend the single live trace's columns; they are encoded in to_json
+        h = max(o, c) if h is None else h
+        l = min(o, c) if l is None else l
+        self._t.append(_wall_ns(ts))
+        self._o.append(o)
+        self._h.append(h)
+        self._l.append(l)
+        self._c.append(c)
+        self._range.push(float(l), float(h))
+        n = len(self._t)
+        if self._history is not None and n > self.viewport_bars:
+            # The bar leaving the full-resolution window joins the history
+            i = n - 1 - self.viewport_bars
+            self._history.add(self._t[i], self._o[i], self._h[i], self._l[i], self._c[i])
+        self._touch()
 
     def add_trade_marker(self, ts, price, side: str):
-        if side == "BUY":
-            # Enhanced BUY marker with glow effect
-            self.fig.add_trace(go.Scatter(
-                x=[ts], y=[price],
-                mode="markers+text",
-                marker=dict(
-                    symbol="triangle-up",
-                    size=20,
-                    color="lime",
-                    line=dict(width=3, color="white"),
-                    opacity=0.9
-                ),
-                text=["BUY"],
-                textposition="top center",
-                textfont=dict(
-                    size=10,
-                    color="lime",
-                    family="JetBrains Mono"
-                ),
-                name="Buy Signal",
-                showlegend=False,
-                hovertemplate="<b>BUY ORDER</b><br>" +
-                            "Time: %{x}<br>" +
-                            "Price: ₹%{y:.2f}<br>" +
-                            "<extra></extra>"
-            ))
-            
-            # Add subtle glow effect
-            self.fig.add_trace(go.Scatter(
-                x=[ts], y=[price],
-                mode="markers",
-                marker=dict(
-                    symbol="triangle-up",
-                    size=35,
-                    color="lime",
-                    opacity=0.3
-                ),
-                showlegend=False,
-                hoverinfo='skip'
-            ))
-            
-        else:  # SELL
-            # Enhanced SELL marker with glow effect
-            self.fig.add_trace(go.Scatter(
-                x=[ts], y=[price],
-                mode="markers+text",
-                marker=dict(
-                    symbol="triangle-down",
-                    size=20,
-                    color="red",
-                    line=dict(width=3, color="white"),
-                    opacity=0.9
-                ),
-                text=["SELL"],
-                textposition="bottom center",
-                textfont=dict(
-                    size=10,
-                    color="red",
-                    family="JetBrains Mono"
-                ),
-                name="Sell Signal",
+        # Appended to the fixed BUY/SELL marker traces; encoded in to_json
+        t, y = self._marks["BUY" if side == "BUY" else "SELL"]
+        t.append(_wall_ns(ts))
+        y.append(price)
+        self._touch()
+
+    def add_volume_bar(self, ts, volume, color='rgba(100, 100, 100, 0.5)'):
+        """Add volume bars at the bottom of the chart"""
+        if VOLUME not in self._series:
+            # Volume subplot under the price panel
+            self._add_series(VOLUME, go.Bar(
+                x=[], y=[],
+                name="Volume",
+                yaxis="y2",
+                marker=dict(line=dict(width=0)),
+                opacity=0.8,
                 showlegend=False,
-                hovertemplate="<b>SELL ORDER</b><br>" +
-                            "Time: %{x}<br>" +
-                            "Price: ₹%{y:.2f}<br>" +
-                            "<extra></extra>"
+                hovertemplate="Volume: %{y:,.0f}<extra></extra>"
+            ), yaxis=dict(domain=[0.26, 1.0]), yaxis2=dict(
+                domain=[0.0, 0.2],
+                anchor="x",
+                gridcolor='#333333',
+                color='#ffffff',
+                showgrid=False,
+                zeroline=False,
+                tickfont=dict(size=10, color='#cccccc')
             ))
-            
-            # Add subtle glow effect
-            self.fig.add_trace(go.Scatter(
-                x=[ts], y=[price],
-                mode="markers",
-                marker=dict(
-                    symbol="triangle-down",
-                    size=35,
-                    color="red",
-                    opacity=0.3
-                ),
-                showlegend=False,
-                hoverinfo='skip'
+        if color not in self._vol_palette:
+            self._vol_palette.append(color)
+        t, y = self._series[VOLUME]
+        self._vol_color.append(self._vol_palette.index(color))
+        t.append(_wall_ns(ts))
+        y.append(volume)
+        self._touch()
+
+    def add_technical_indicator(self, ts_list, values, name, color='#ffff00'):
+        """Add technical indicators like moving averages"""
+        # One fixed trace per indicator name; later calls append to it, so
+        # streaming one value per bar is O(1)
+        if name not in self._series:
+            self._add_series(name, go.Scatter(
+                x=[], y=[],
+                mode='lines',
+                name=name,
+                line=dict(color=color, width=2, dash='dot'),
+                opacity=0.8,
+                showlegend=True
             ))
+        if np.ndim(values) == 0:
+            ts_list, values = [ts_list], [values]
+        t, y = self._series[name]
+        last_bar = self._t[-1] if len(self._t) else None
+        for ts, value in zip(ts_list, values):
+            ns = _wall_ns(ts)
+            t.append(ns)
+            y.append(value)
+            # Keep overlays inside the y-range (the viewport only tracks the latest bar)
+            if np.isfinite(value) and (self._range.window is None or ns == last_bar):
+                self._range.extend_last(float(value), float(value))
+        self._touch()
+
+    def add_support_resistance(self, price_level, label, color='#ff00ff'):
+        """Add support/resistance lines"""
+        with self._lock:
+            self.fig.add_hline(
+                y=price_level,
+                line_dash="dash",
+                line_color=color,
+                line_width=2,
+                opacity=0.7,
+                annotation_text=label,
+                annotation_position="top right"
+            )
+            self._static = None
+        self.version += 1
+
+    def cursor(self) -> Dict:
+        """Position just after everything appended so far (see `delta_since`)."""
+        # Counted on the column each append writes last, so a concurrent append is never half-read
+        with self._lock:
+            series = {name: len(y) for name, (_, y) in self._series.items()}
+        return {"epoch": self.epoch, "version": self.version, "bars": len(self._c),
+                "buy": len(self._marks["BUY"][1]), "sell": len(self._marks["SELL"][1]),
+                "series": series}
+
+    def delta_since(self, cursor: Optional[Dict] = None) -> Dict:
+        """
+        Candles, trade markers, volume and overlay points appended after
+        `cursor`, plus the new cursor.
+        O(new items). `reset` is True (and nothing is sent) when the cursor
+        belongs to another epoch; the client should then reload the full figure.
+        """
+        now = self.cursor()
+        cursor = cursor or {}
+        seen = cursor.get("series") or {}
+        reset = cursor.get("epoch") != self.epoch or any(
+            not 0 <= int(cursor.get(k, -1)) <= now[k] for k in ("bars", "buy", "sell")) or any(
+            not 0 <= int(seen.get(name, 0)) <= m for name, m in now["series"].items())
+        since = now if reset else cursor
+
+        def iso(t: np.ndarray):
+            return np.datetime_as_string(t.view("datetime64[ns]"), unit="s").tolist()
+
+        b, n = int(since["bars"]), now["bars"]
+        candles = {"t": iso(self._t.view[b:n])}
+        for key, col in (("o", self._o), ("h", self._h), ("l", self._l), ("c", self._c)):
+            candles[key] = col.view[b:n].tolist()
+        markers = {}
+        for side, key in (("BUY", "buy"), ("SELL", "sell")):
+            t, y = self._marks[side]
+            k, m = int(since[key]), now[key]
+            markers[side] = {"t": iso(t.view[k:m]), "y": y.view[k:m].tolist()}
+        series = {}
+        for name, m in now["series"].items():
+            t, y = self._series[name]
+            k = m if reset else int(seen.get(name, 0))
+            series[name] = {"t": iso(t.view[k:m]), "y": y.view[k:m].tolist()}
+            if name == VOLUME:
+                series[name]["color"] = [self._vol_palette[c] for c in self._vol_color.view[k:m]]
+        return {"reset": reset, "cursor": now, "candles": candles, "markers": markers, "series": series}
+
+    def to_json(self) -> "ChartPayload":
+        # One payload per chart version, shared by every viewer and encoded on first use
+        with self._lock:
+            key = (self.epoch, self.version)
+            if self._payload is None or self._payload.key != key:
+                self._payload = ChartPayload(key, self._encode, self.latency)
+            return self._payload
+
+    def compact_style(self) -> Dict:
+        """
+        Layout and per-trace styling for `compact_payload`, without any data.
+        Clients fetch it once per epoch.
+        """
+        with self._lock:
+            static = self._static_json()
+            series_idx = dict(self._series_idx)
+            i = self._live_idx
+        data = static["data"]
+        arrays = ("x", "y", "open", "high", "low", "close")
+
+        def style(j: int) -> Dict:
+            return {k: v for k, v in data[j].items() if k not in arrays}
+
+        traces = {"live": style(i), "buy": style(i + 1), "buy_glow": style(i + 2),
+                  "sell": style(i + 3), "sell_glow": style(i + 4)}
+        if i:
+            traces["history"] = style(0)
+        for name, j in series_idx.items():
+            traces[f"series.{name}"] = style(j)
+        return {"format": COMPACT_FORMAT, "epoch": self.epoch, "layout": static["layout"], "traces": traces}
+
+    def compact_payload(self) -> Dict:
+        """
+        The chart's data as typed columns (see `_pack_columns`), cached per
+        version: live candles t/o/h/l/c (+ v), history, trade markers and
+        overlay series. Times are wall-clock epoch seconds; styling comes
+        from `compact_style`. About an order of magnitude smaller than the
+        figure JSON.
+        """
+        with self._lock:
+            key = (self.epoch, self.version)
+            if self._compact is None or self._compact[0] != key:
+                self._compact = (key, self._encode_compact())
+            return self._compact[1]
+
+    def _encode_compact(self) -> Dict:
+        n = len(self._c)
+        first = max(n - self.viewport_bars, 0) if self._history is not None else 0
+        t = self._t.view[first:n]
+        cols: Dict[str, Tuple[np.ndarray, float]] = {
+            "t": (t / 1e9, 1), "o": (self._o.view[first:n], PRICE_TICK), "h": (self._h.view[first:n], PRICE_TICK),
+            "l": (self._l.view[first:n], PRICE_TICK), "c": (self._c.view[first:n], PRICE_TICK),
+        }
+        if self._history is not None:
+            ht, ho, hh, hl, hc = self._history.columns()
+        else:
+            ht, (ho, hh, hl, hc) = self._ctx_t, self._ctx_ohlc
+        for key, values, scale in (("t", ht / 1e9, 1), ("o", ho, PRICE_TICK), ("h", hh, PRICE_TICK),
+                                   ("l", hl, PRICE_TICK), ("c", hc, PRICE_TICK)):
+            cols[f"history.{key}"] = (values, scale)
+        for side in ("BUY", "SELL"):
+            mt, my = self._marker_columns(side, first, n)
+            cols[f"{side.lower()}.t"] = (mt / 1e3, 1)
+            cols[f"{side.lower()}.y"] = (my, PRICE_TICK)
+        for name in self._series_idx:
+            st, sy, start, m = self._series_columns(name, first)
+            scale = 1 if name == VOLUME else PRICE_TICK
+            # Series recorded once per bar share the candles' time column
+            aligned = len(sy) == len(t) and (not len(t) or (st[0] == t[0] // 1_000_000 and st[-1] == t[-1] // 1_000_000))
+            prefix = "v" if name == VOLUME and aligned else f"series.{name}"
+            if not aligned:
+                cols[f"{prefix}.t"] = (st / 1e3, 1)
+            cols["v" if prefix == "v" else f"{prefix}.y"] = (sy, scale)
+            if name == VOLUME:
+                cols[f"{prefix}.color"] = (self._vol_color.view[start:m], 1)
+        payload = {"format": COMPACT_FORMAT, "epoch": self.epoch, "version": self.version,
+                   "palette": list(self._vol_palette)}
+        payload.update(_pack_columns(cols))
+        return payload
+
+    def figure(self) -> go.Figure:
+        """The current chart as a Plotly figure (for export; the live path never builds one)."""
+        return go.Figure(orjson.loads(self.to_json().to_json()))
+
+
+class NullCandles(Candles):
+    """Chart sink for headless sessions: accepts every update, builds no Plotly objects."""
+    def __init__(self, viewport_bars: Optional[int] = None, history_buckets: int = 500):
+        self.fig = None
+        self.epoch = self.version = 0
+
+    def __getstate__(self):
+        return {}
+
+    def __setstate__(self, state):
+        self.fig = None
+        self.epoch = self.version = 0
+
+    @property
+    def live_bars(self) -> int:
+        return 0
+
+    def init_context(self, context_df: pd.DataFrame):
+        pass
+
+    def append_live_candle(self, ts, o, c, h=None, l=None):
+        pass
+
+    def add_trade_marker(self, ts, price, side: str):
+        pass
 
     def add_volume_bar(self, ts, volume, color='rgba(100, 100, 100, 0.5)'):
-        """Add volume bars at the bottom of the chart"""
-        # This could be extended to show volume data
         pass
 
     def add_technical_indicator(self, ts_list, values, name, color='#ffff00'):
-        """Add technical indicators like moving averages"""
-        self.fig.add_trace(go.Scatter(
-            x=ts_list,
-            y=values,
-            mode='lines',
-            name=name,
-            line=dict(color=color, width=2, dash='dot'),
-            opacity=0.8,
-            showlegend=True
-        ))
+        pass
 
     def add_support_resistance(self, price_level, label, color='#ff00ff'):
-        """Add support/resistance lines"""
-        self.fig.add_hline(
-            y=price_level,
-            line_dash="dash",
-            line_color=color,
-            line_width=2,
-            opacity=0.7,
-            annotation_text=label,
-            annotation_position="top right"
-        )
+        pass
+
+    def cursor(self) -> Dict:
+        return {"epoch": 0, "version": 0, "bars": 0, "buy": 0, "sell": 0, "series": {}}
+
+    def delta_since(self, cursor: Optional[Dict] = None) -> Dict:
+        return {"reset": False, "cursor": self.cursor(), "candles": {}, "markers": {}, "series": {}}
 
     def to_json(self):
-        # Return the enhanced figure for Gradio
-        return self.fig
\ No newline at end of file
+        return None
+
+    def compact_style(self) -> Dict:
+        return {}
+
+    def compact_payload(self) -> Dict:
+        return {}
+
+    def figure(self):
+        return None
@@ -0,0 +1,125 @@
+# checkpoint.py
+from __future__ import annotations
+import os
+import pickle
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+
+# File layout: MAGIC | u16 format version | u32 crc32(payload) | zlib(pickle(state))
+MAGIC = b"FBCK"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHI")
+
+
+def encode_state(state: Any) -> bytes:
+    """Pickle the session state. Must run on the thread that owns the state."""
+    return pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def write_atomic(path: Path, raw: bytes, level: int = 1):
+    """Compress and write a checkpoint; readers never observe a partial file."""
+    payload = zlib.compress(raw, level)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, zlib.crc32(payload)))
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path: Path, root: Optional[Path] = None) -> Any:
+    """
+    Load a checkpoint. Checkpoints are pickles and the header only detects
+    corruption, not tampering, so only load trusted files: with `root`, any
+    path that does not resolve inside that directory is refused.
+    """
+    path = Path(path)
+    if root is not None:
+        resolved, root = path.resolve(), Path(root).resolve()
+        if not resolved.is_relative_to(root):
+            raise ValueError(f"Refusing to load {path}: checkpoints must be inside {root}")
+        path = resolved
+    blob = path.read_bytes()
+    if len(blob) < _HEADER.size:
+        raise ValueError(f"Checkpoint {path} is truncated")
+    magic, version, crc = _HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a trading session checkpoint")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version {version} (expected {FORMAT_VERSION})")
+    payload = blob[_HEADER.size:]
+    if zlib.crc32(payload) != crc:
+        raise ValueError(f"Checkpoint {path} is corrupt (CRC mismatch)")
+    return pickle.loads(zlib.decompress(payload))
+
+
+class Checkpointer:
+    """
+    Periodic session checkpoints.
+    The state is pickled on the caller's thread (a consistent view between bars);
+    compression and the atomic write happen on a background thread. If a newer
+    checkpoint arrives before the previous one is written, only the newest is kept.
+    """
+    def __init__(self, directory: Path, every_n_bars: int = 10):
+        self.directory = Path(directory)
+        self.every_n_bars = every_n_bars
+        self.last_path: Optional[Path] = None
+        self.last_error: Optional[str] = None
+        self._last_bar = -1
+        self._pending: Optional[Tuple[Path, bytes]] = None
+        self._cond = threading.Condition()
+        self._busy = False
+        self._worker: Optional[threading.Thread] = None
+
+    def path_for(self, ticker: str) -> Path:
+        return self.directory / f"{ticker.replace('.', '_')}_session.ckpt"
+
+    def maybe_save(self, state: Any, bar_idx: int) -> bool:
+        """Checkpoint every `every_n_bars` bars; returns True if a save was queued."""
+        if self.every_n_bars <= 0 or bar_idx == self._last_bar or bar_idx % self.every_n_bars:
+            return False
+        self.save(state, bar_idx)
+        return True
+
+    def save(self, state: Any, bar_idx: int = -1) -> Path:
+        path = self.path_for(state.ticker)
+        raw = encode_state(state)
+        self._last_bar = bar_idx
+        with self._cond:
+            self._pending = (path, raw)
+            self._ensure_worker()
+            self._cond.notify()
+        return path
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until queued checkpoints are on disk."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pending is None and not self._busy, timeout)
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None)
+                path, raw = self._pending
+                self._pending = None
+                self._busy = True
+            try:
+                write_atomic(path, raw)
+                self.last_path, self.last_error = path, None
+            except OSError as e:
+                self.last_error = str(e)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
@@ -0,0 +1,71 @@
+# costs.py
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+
+@dataclass(frozen=True)
+class NseCostModel:
+    """
+    NSE intraday equity transaction costs plus volume-participation slippage.
+    All rates are fractions of turnover unless noted. Works per fill (`fill`)
+    and as a vectorized pass over fill arrays (`fill_arrays`, `apply_to_fills`).
+    """
+    brokerage_rate: float = 0.0003      # 0.03% per executed order ...
+    brokerage_cap: float = 20.0         # ... capped at ₹20
+    stt_sell_rate: float = 0.00025      # STT, sell side (intraday)
+    exchange_rate: float = 0.0000297    # NSE transaction charges
+    sebi_rate: float = 0.000001         # ₹10 per crore
+    gst_rate: float = 0.18              # on brokerage + exchange + SEBI
+    stamp_buy_rate: float = 0.00003     # stamp duty, buy side (intraday)
+    half_spread_bps: float = 2.0        # always paid crossing the spread
+    impact_coef: float = 0.01           # square-root impact: coef * sqrt(qty / bar volume)
+    max_slippage_pct: float = 0.02      # cap on total slippage
+
+    def slippage_frac(self, qty, volume):
+        """Adverse price move as a fraction of price, for arrays or scalars."""
+        qty = np.asarray(qty, dtype=np.float64)
+        frac = np.full(qty.shape, self.half_spread_bps / 1e4)
+        if volume is not None:
+            volume = np.asarray(volume, dtype=np.float64)
+            participation = np.divide(qty, volume, out=np.zeros_like(qty), where=volume > 0)
+            frac = frac + self.impact_coef * np.sqrt(participation)
+        return np.minimum(frac, self.max_slippage_pct)
+
+    def fill_arrays(self, side, qty, price, volume=None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized costs for many fills.
+        side: +1 BUY / -1 SELL. Returns (execution prices, total charges in ₹).
+        """
+        side = np.asarray(side, dtype=np.int8)
+        qty = np.asarray(qty, dtype=np.float64)
+        price = np.asarray(price, dtype=np.float64)
+        is_buy = side > 0
+
+        exec_price = price * (1.0 + side * self.slippage_frac(qty, volume))
+        turnover = qty * exec_price
+        brokerage = np.minimum(turnover * self.brokerage_rate, self.brokerage_cap)
+        exchange = turnover * self.exchange_rate
+        sebi = turnover * self.sebi_rate
+        gst = (brokerage + exchange + sebi) * self.gst_rate
+        stt = np.where(is_buy, 0.0, turnover * self.stt_sell_rate)
+        stamp = np.where(is_buy, turnover * self.stamp_buy_rate, 0.0)
+        return exec_price, brokerage + exchange + sebi + gst + stt + stamp
+
+    def fill(self, side: str, qty: int, price: float, volume: Optional[float] = None) -> Tuple[float, float]:
+        """Single live fill: (execution price, total charges in ₹)."""
+        exec_price, charges = self.fill_arrays(1 if side == "BUY" else -1, qty, price, volume)
+        return round(float(exec_price), 4), round(float(charges), 4)
+
+    def apply_to_fills(self, fill_log, volume=None) -> Dict[str, np.ndarray]:
+        """Re-cost a zero-cost FillLog (e.g. a backtest sweep) in one vectorized pass."""
+        cols = fill_log.columns()
+        exec_price, charges = self.fill_arrays(cols["side"], cols["qty"], cols["price"], volume)
+        slippage = (exec_price - cols["price"]) * cols["side"] * cols["qty"]
+        return {
+            "exec_price": exec_price,
+            "charges": charges,
+            "slippage": slippage,
+            "total_cost": float(charges.sum() + slippage.sum()),
+        }
@@ -0,0 +1,98 @@
+# equity.py
+from __future__ import annotations
+import math
+from collections import deque
+from typing import Deque, Dict
+import numpy as np
+
+from arrays import GrowableArray
+
+
+BARS_PER_YEAR = 252 * 75  # 5-minute bars, 09:15-15:30 IST
+
+
+class EquityCurve:
+    """
+    Per-bar equity curve with running risk statistics.
+    Every record() is O(1): running peak and max drawdown, Welford mean/variance
+    of bar returns, downside deviation, a fixed-window rolling volatility and
+    time-in-market are all updated incrementally.
+    """
+    def __init__(self, starting_equity: float, window: int = 20, bars_per_year: int = BARS_PER_YEAR):
+        self.starting_equity = float(starting_equity)
+        self.window = window
+        self.bars_per_year = bars_per_year
+        self.ts = GrowableArray(np.int64)
+        self.equity = GrowableArray(np.float64)
+        self.peak = self.starting_equity
+        self.max_drawdown = 0.0
+        self.max_drawdown_pct = 0.0
+        self.exposed_bars = 0
+        self._last = self.starting_equity
+        # Welford accumulators over bar returns
+        self._n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._downside_sq = 0.0
+        # Rolling window of bar returns
+        self._window: Deque[float] = deque()
+        self._win_sum = 0.0
+        self._win_sumsq = 0.0
+
+    def __len__(self) -> int:
+        return len(self.equity)
+
+    def record(self, ts_ns: int, equity: float, exposed: bool):
+        self.ts.append(ts_ns)
+        self.equity.append(equity)
+        if exposed:
+            self.exposed_bars += 1
+
+        if equity > self.peak:
+            self.peak = equity
+        drawdown = self.peak - equity
+        if drawdown > self.max_drawdown:
+            self.max_drawdown = drawdown
+            self.max_drawdown_pct = drawdown / self.peak if self.peak > 0 else 0.0
+
+        r = equity / self._last - 1.0 if self._last > 0 else 0.0
+        self._last = equity
+        self._n += 1
+        delta = r - self._mean
+        self._mean += delta / self._n
+        self._m2 += delta * (r - self._mean)
+        if r < 0:
+            self._downside_sq += r * r
+
+        self._window.append(r)
+        self._win_sum += r
+        self._win_sumsq += r * r
+        if len(self._window) > self.window:
+            old = self._window.popleft()
+            self._win_sum -= old
+            self._win_sumsq -= old * old
+
+    def stats(self) -> Dict:
+        n = self._n
+        equity = self._last
+        std = math.sqrt(self._m2 / (n - 1)) if n > 1 else 0.0
+        downside = math.sqrt(self._downside_sq / n) if n else 0.0
+        w = len(self._window)
+        win_var = (self._win_sumsq - self._win_sum ** 2 / w) / (w - 1) if w > 1 else 0.0
+        annualize = math.sqrt(self.bars_per_year)
+        drawdown = self.peak - equity
+        return {
+            "bars": n,
+            "equity": round(equity, 2),
+            "peak_equity": round(self.peak, 2),
+            "return_pct": round((equity / self.starting_equity - 1) * 100, 3) if self.starting_equity else 0.0,
+            "drawdown": round(drawdown, 2),
+            "drawdown_pct": round(drawdown / self.peak * 100, 3) if self.peak > 0 else 0.0,
+            "max_drawdown": round(self.max_drawdown, 2),
+            "max_drawdown_pct": round(self.max_drawdown_pct * 100, 3),
+            "volatility_pct": round(std * annualize * 100, 3),
+            "rolling_volatility_pct": round(math.sqrt(max(win_var, 0.0)) * annualize * 100, 3),
+            "sharpe": round(self._mean / std * annualize, 3) if std > 0 else 0.0,
+            "sortino": round(self._mean / downside * annualize, 3) if downside > 0 else 0.0,
+            "exposure_time_pct": round(self.exposed_bars / n * 100, 2) if n else 0.0,
+        }
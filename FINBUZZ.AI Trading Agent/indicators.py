@@ -0,0 +1,86 @@
+# indicators.py
+from __future__ import annotations
+import math
+from typing import Dict
+import numpy as np
+import pandas as pd
+
+
+class RollingStats:
+    """Mean and standard deviation of the last `window` values, O(1) per push (sliding Welford update)."""
+    def __init__(self, window: int):
+        self.window = int(window)
+        self._buf = np.zeros(self.window)
+        self._next = 0
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    @property
+    def full(self) -> bool:
+        return self.count == self.window
+
+    @property
+    def std(self) -> float:
+        # Population std, as Bollinger bands use
+        return math.sqrt(max(self._m2, 0.0) / self.count) if self.count else 0.0
+
+    def push(self, x: float):
+        if self.full:
+            old = float(self._buf[self._next])
+            mean = self.mean + (x - old) / self.window
+            self._m2 += (x - old) * (x - mean + old - self.mean)
+            self.mean = mean
+        else:
+            self.count += 1
+            delta = x - self.mean
+            self.mean += delta / self.count
+            self._m2 += delta * (x - self.mean)
+        self._buf[self._next] = x
+        self._next = (self._next + 1) % self.window
+
+
+class StreamingIndicators:
+    """
+    Moving-average and Bollinger state for the chart overlays, updated once
+    per closed bar in O(1) instead of recomputing over the bar history.
+    Values are NaN until their window has filled. (The decision ATR is
+    computed with the other policy indicators in TraderAgent.)
+    """
+    def __init__(self, sma_window: int = 20, ema_span: int = 20, bb_window: int = 20, bb_k: float = 2.0):
+        self.sma_window = sma_window
+        self.ema_span = ema_span
+        self.bb_k = bb_k
+        self._sma = RollingStats(sma_window)
+        self._bb = self._sma if bb_window == sma_window else RollingStats(bb_window)
+        self._alpha = 2.0 / (ema_span + 1)
+        self._ema = math.nan
+        self._ema_count = 0
+        self.bars = 0
+
+    def update(self, c: float) -> Dict[str, float]:
+        """Fold in one bar's close and return the indicator values as of that close."""
+        self.bars += 1
+        self._sma.push(c)
+        if self._bb is not self._sma:
+            self._bb.push(c)
+        self._ema = c if self._ema_count == 0 else self._ema + self._alpha * (c - self._ema)
+        self._ema_count += 1
+        return self.values()
+
+    def seed(self, df: pd.DataFrame):
+        """Warm up on prior bars (e.g. the context day) so overlays start with the session."""
+        for c in df["Close"].to_numpy(dtype=np.float64):
+            self.update(float(c))
+
+    def values(self) -> Dict[str, float]:
+        nan = math.nan
+        bb_mid = self._bb.mean if self._bb.full else nan
+        bb_width = self.bb_k * self._bb.std if self._bb.full else nan
+        return {
+            f"sma_{self.sma_window}": self._sma.mean if self._sma.full else nan,
+            f"ema_{self.ema_span}": self._ema if self._ema_count >= self.ema_span else nan,
+            "bb_mid": bb_mid,
+            "bb_upper": bb_mid + bb_width,
+            "bb_lower": bb_mid - bb_width,
+        }
@@ -0,0 +1,177 @@
+# journal.py
+from __future__ import annotations
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import pandas as pd
+
+from portfolio import Portfolio
+from lots import FIFO
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq     INTEGER PRIMARY KEY AUTOINCREMENT,
+    session TEXT    NOT NULL,
+    ticker  TEXT    NOT NULL,
+    ts      INTEGER NOT NULL,  -- epoch nanoseconds (UTC)
+    bar     INTEGER NOT NULL,  -- StreamCursor position when recorded
+    kind    TEXT    NOT NULL,  -- session | resume | bar | decision | fill
+    payload TEXT    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_session ON events(session, seq);
+CREATE INDEX IF NOT EXISTS idx_events_ticker_ts ON events(ticker, ts);
+CREATE INDEX IF NOT EXISTS idx_events_ts ON events(ts);
+CREATE TRIGGER IF NOT EXISTS events_no_update BEFORE UPDATE ON events
+BEGIN SELECT RAISE(ABORT, 'trading journal is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS events_no_delete BEFORE DELETE ON events
+BEGIN SELECT RAISE(ABORT, 'trading journal is append-only'); END;
+"""
+
+
+def _epoch_ns(ts: Any) -> int:
+    return int(pd.Timestamp(ts).value)
+
+
+class TradingJournal:
+    """
+    Append-only, event-sourced journal of bars, decisions and fills.
+    Events are buffered in memory and committed in batches (one fsync per batch),
+    so recording on the per-bar path is just a list append.
+    """
+    def __init__(self, path: Path, batch_size: int = 64):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self._buffer: List[Tuple[str, str, int, int, str, str]] = []
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(_SCHEMA)
+
+    # ------------------------
+    # Write path
+    # ------------------------
+    def append(self, session: str, ticker: str, ts: Any, bar: int, kind: str, **payload):
+        row = (session, ticker, _epoch_ns(ts), int(bar), kind, json.dumps(payload, default=str))
+        with self._lock:
+            self._buffer.append(row)
+            if len(self._buffer) >= self.batch_size:
+                self._flush_locked()
+
+    def record_session(self, session: str, ticker: str, ts: Any, starting_cash: float, lot_method: str = FIFO):
+        self.append(session, ticker, ts, 0, "session", starting_cash=float(starting_cash), lot_method=lot_method)
+        self.flush()
+
+    def record_resume(self, session: str, ticker: str, ts: Any, bar: int):
+        self.append(session, ticker, ts, bar, "resume")
+        self.flush()
+
+    def record_bar(self, session: str, ticker: str, ts: Any, bar: int,
+                   o: float, h: float, l: float, c: float, v: float):
+        self.append(session, ticker, ts, bar, "bar", open=o, high=h, low=l, close=c, volume=v)
+
+    def record_decision(self, session: str, ticker: str, ts: Any, bar: int,
+                        source: str, action: str, qty: int, reason: str):
+        self.append(session, ticker, ts, bar, "decision", source=source, action=action, qty=qty, reason=reason)
+
+    def record_fill(self, session: str, ticker: str, ts: Any, bar: int, side: str, qty: int, price: float,
+                    fees: float = 0.0):
+        self.append(session, ticker, ts, bar, "fill", side=side, qty=qty, price=price, fees=fees, ts_iso=str(ts))
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(
+                "INSERT INTO events (session, ticker, ts, bar, kind, payload) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.execute("COMMIT")
+        except sqlite3.Error:
+            self._conn.execute("ROLLBACK")
+            self._buffer = rows + self._buffer
+            raise
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    # ------------------------
+    # Queries
+    # ------------------------
+    def query(self, session: Optional[str] = None, ticker: Optional[str] = None,
+              kind: Optional[str] = None, start: Any = None, end: Any = None,
+              limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Events matching all given filters, in append order (uses the session/ticker/ts indexes)."""
+        clauses, params = [], []
+        if session is not None:
+            clauses.append("session = ?"); params.append(session)
+        if ticker is not None:
+            clauses.append("ticker = ?"); params.append(ticker)
+        if kind is not None:
+            clauses.append("kind = ?"); params.append(kind)
+        if start is not None:
+            clauses.append("ts >= ?"); params.append(_epoch_ns(start))
+        if end is not None:
+            clauses.append("ts <= ?"); params.append(_epoch_ns(end))
+        sql = "SELECT seq, session, ticker, ts, bar, kind, payload FROM events"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY seq"
+        if limit is not None:
+            sql += " LIMIT ?"; params.append(int(limit))
+
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            {"seq": seq, "session": sess, "ticker": tick, "ts": ts, "bar": bar, "kind": k, **json.loads(payload)}
+            for seq, sess, tick, ts, bar, k, payload in rows
+        ]
+
+    def sessions(self, ticker: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self.query(ticker=ticker, kind="session")
+
+    # ------------------------
+    # Recovery
+    # ------------------------
+    def replay_portfolio(self, session: str) -> Portfolio:
+        """
+        Rebuild a session's Portfolio from its journal.
+        A `resume` event at bar k supersedes fills recorded at bar >= k before it
+        (those bars were re-run after restoring an older checkpoint).
+        """
+        events = self.query(session=session)
+        start = next((e for e in events if e["kind"] == "session"), None)
+        if start is None:
+            raise ValueError(f"No session event for {session}")
+
+        fills: List[Dict[str, Any]] = []
+        last_close: Optional[float] = None
+        for e in events:
+            if e["kind"] == "fill":
+                fills.append(e)
+            elif e["kind"] == "bar":
+                last_close = e["close"]
+            elif e["kind"] == "resume":
+                fills = [f for f in fills if f["bar"] < e["bar"]]
+
+        portfolio = Portfolio(cash=start["starting_cash"], lot_method=start.get("lot_method", FIFO))
+        for f in fills:
+            # Fills are journaled at their costed execution price, so book them as-is
+            portfolio.apply_fill(f["ts_iso"], f["side"], f["qty"], f["price"], f.get("fees", 0.0))
+            portfolio.mark(f["price"])
+        if last_close is not None:
+            portfolio.mark(last_close)
+        return portfolio
@@ -0,0 +1,145 @@
+# lots.py
+from __future__ import annotations
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Tuple
+
+
+FIFO = "FIFO"
+LIFO = "LIFO"
+AVERAGE = "AVERAGE"
+LOT_METHODS = (FIFO, LIFO, AVERAGE)
+
+
+@dataclass
+class ClosedLot:
+    symbol: str
+    qty: int
+    entry_ns: int
+    exit_ns: int
+    entry_price: float
+    exit_price: float
+
+    @property
+    def pnl(self) -> float:
+        return (self.exit_price - self.entry_price) * self.qty
+
+    @property
+    def holding_seconds(self) -> float:
+        return (self.exit_ns - self.entry_ns) / 1e9
+
+
+class LotBook:
+    """
+    Open tax lots per symbol, matched on sells by FIFO, LIFO or average cost.
+    Each lot is pushed once and popped at most once (a partial match only
+    shrinks the head lot), so a sell is amortized O(1) in the number of lots.
+    This is the single source of realized P&L, holding periods and win/loss
+    classification for a portfolio.
+    """
+    def __init__(self, method: str = FIFO):
+        method = method.upper()
+        if method not in LOT_METHODS:
+            raise ValueError(f"Unknown lot method {method}; expected one of {LOT_METHODS}")
+        self.method = method
+        # lot = [qty, price, entry_ns]
+        self._lots: Dict[str, Deque[List]] = {}
+        self._shares: Dict[str, int] = {}
+        self._cost: Dict[str, float] = {}
+        # Running closed-trade statistics (one "trade" per sell)
+        self.realized_pnl = 0.0
+        self.closed_trades = 0
+        self.wins = 0
+        self.losses = 0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+        self.closed_qty = 0
+        self._holding_qty_seconds = 0.0
+
+    # ------------------------
+    # Positions
+    # ------------------------
+    def shares(self, symbol: str = "") -> int:
+        return self._shares.get(symbol, 0)
+
+    def cost_basis(self, symbol: str = "") -> float:
+        return self._cost.get(symbol, 0.0) if self._shares.get(symbol, 0) else 0.0
+
+    def avg_cost(self, symbol: str = "") -> float:
+        shares = self._shares.get(symbol, 0)
+        return self._cost[symbol] / shares if shares else 0.0
+
+    def open_lots(self, symbol: str = "") -> List[Tuple[int, float, int]]:
+        return [tuple(lot) for lot in self._lots.get(symbol, ())]
+
+    # ------------------------
+    # Matching
+    # ------------------------
+    def open(self, ts_ns: int, qty: int, price: float, symbol: str = ""):
+        lots = self._lots.setdefault(symbol, deque())
+        shares = self._shares.get(symbol, 0)
+        if self.method == AVERAGE and lots:
+            # One blended lot; entry time is the quantity-weighted average
+            lot = lots[0]
+            total = lot[0] + qty
+            lot[1] = (lot[0] * lot[1] + qty * price) / total
+            lot[2] = (lot[0] * lot[2] + qty * ts_ns) // total
+            lot[0] = total
+        else:
+            lots.append([qty, price, ts_ns])
+        self._shares[symbol] = shares + qty
+        self._cost[symbol] = self._cost.get(symbol, 0.0) + qty * price
+
+    def close(self, ts_ns: int, qty: int, price: float, symbol: str = "") -> Tuple[float, List[ClosedLot]]:
+        """Match `qty` against open lots; returns (realized P&L, closed lot slices)."""
+        lots = self._lots.get(symbol)
+        if not lots or qty > self._shares.get(symbol, 0):
+            raise ValueError(f"Cannot close {qty} of {symbol or 'position'}: only {self._shares.get(symbol, 0)} open")
+
+        pop_head = self.method != LIFO
+        remaining = qty
+        pnl = 0.0
+        released = 0.0
+        closed: List[ClosedLot] = []
+        while remaining:
+            lot = lots[0] if pop_head else lots[-1]
+            take = min(remaining, lot[0])
+            closed.append(ClosedLot(symbol, take, lot[2], ts_ns, lot[1], price))
+            pnl += (price - lot[1]) * take
+            released += lot[1] * take
+            self._holding_qty_seconds += take * (ts_ns - lot[2]) / 1e9
+            lot[0] -= take
+            remaining -= take
+            if lot[0] == 0:
+                lots.popleft() if pop_head else lots.pop()
+
+        self._shares[symbol] -= qty
+        self._cost[symbol] = self._cost[symbol] - released if self._shares[symbol] else 0.0
+        self.realized_pnl += pnl
+        self.closed_qty += qty
+        self.closed_trades += 1
+        if pnl > 0:
+            self.wins += 1
+            self.gross_profit += pnl
+        elif pnl < 0:
+            self.losses += 1
+            self.gross_loss += pnl
+        return pnl, closed
+
+    # ------------------------
+    # Statistics
+    # ------------------------
+    def stats(self) -> Dict:
+        trades = self.closed_trades
+        return {
+            "lot_method": self.method,
+            "closed_trades": trades,
+            "wins": self.wins,
+            "losses": self.losses,
+            "win_rate": self.wins / trades if trades else 0.0,
+            "realized_pnl": round(self.realized_pnl, 2),
+            "gross_profit": round(self.gross_profit, 2),
+            "gross_loss": round(self.gross_loss, 2),
+            "profit_factor": round(self.gross_profit / -self.gross_loss, 3) if self.gross_loss < 0 else None,
+            "avg_holding_minutes": round(self._holding_qty_seconds / self.closed_qty / 60, 2) if self.closed_qty else 0.0,
+        }
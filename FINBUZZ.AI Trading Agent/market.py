@@ -39,10 +39,23 @@ def _slice_recent_days(df: pd.DataFrame) -> pd.DataFrame:
     return df.loc[(df.index >= START_DATE) & (df.index <= END_DATE)]
 
 
+def ensure_high_low(df: pd.DataFrame) -> pd.DataFrame:
+    """Add High/Low columns (bar body range) when a source only has Open/Close."""
+    if "High" in df.columns and "Low" in df.columns:
+        return df
+    df = df.copy()
+    o, c = df["Open"].to_numpy(dtype=np.float64), df["Close"].to_numpy(dtype=np.float64)
+    if "High" not in df.columns:
+        df["High"] = np.maximum(o, c)
+    if "Low" not in df.columns:
+        df["Low"] = np.minimum(o, c)
+    return df
+
+
 def download_and_prepare(ticker: str, data_dir: Path) -> Tuple[pd.DataFrame, Path]:
     """
     Downloads recent 10d-5m data, converts to IST, filters to last 10 trading days, market hours,
-    saves CSV with Open,Close,Volume only, returns filtered OHLCV df and csv path.
+    saves CSV with Open,High,Low,Close,Volume, returns filtered OHLCV df and csv path.
     """
     data_dir.mkdir(parents=True, exist_ok=True)
     
@@ -70,7 +83,7 @@ def download_and_prepare(ticker: str, data_dir: Path) -> Tuple[pd.DataFrame, Pat
         col_mapping[col_str.lower()] = col_str
     
     # Check and rename required columns
-    required_columns = ["Open", "Close", "Volume"]
+    required_columns = ["Open", "High", "Low", "Close", "Volume"]
     for required in required_columns:
         required_lower = required.lower()
         
@@ -87,7 +100,7 @@ def download_and_prepare(ticker: str, data_dir: Path) -> Tuple[pd.DataFrame, Pat
             available_cols = list(df.columns)
             raise ValueError(f"Column '{required}' missing in data. Available columns: {available_cols}")
 
-    csv_df = df[["Open", "Close", "Volume"]].copy()
+    csv_df = df[["Open", "High", "Low", "Close", "Volume"]].copy()
     start_str = START_DATE.strftime("%Y-%m-%d")
     end_str = END_DATE.strftime("%Y-%m-%d")
     csv_path = data_dir / f"{ticker.replace('.', '_')}_5m_{start_str}_to_{end_str}.csv"
@@ -105,7 +118,7 @@ class StreamCursor:
     """
     def __init__(self, df: pd.DataFrame):
         # Sort by time and split data
-        df = df.sort_index()
+        df = ensure_high_low(df.sort_index())
         
         # Get unique trading days
         unique_dates = df.index.date
@@ -125,31 +138,48 @@ class StreamCursor:
         # Iterator state for trading data
         self._iter_idx = 0
         self._times = self.trade_df.index.to_list()
+        # Bar columns as arrays: per-bar access is an index, not a .loc lookup
+        self._open = self.trade_df["Open"].to_numpy(dtype=np.float64)
+        self._high = self.trade_df["High"].to_numpy(dtype=np.float64)
+        self._low = self.trade_df["Low"].to_numpy(dtype=np.float64)
+        self._close = self.trade_df["Close"].to_numpy(dtype=np.float64)
+        self._volume = self.trade_df["Volume"].to_numpy(dtype=np.float64)
 
     def get_context_df(self) -> pd.DataFrame:
         # Return first day data for market preview
         return self.context_df
 
+    @property
+    def position(self) -> int:
+        # Number of trading bars already committed
+        return self._iter_idx
+
     def has_next(self) -> bool:
         return self._iter_idx < len(self._times)
 
     def peek_next_open_volume(self) -> Optional[Tuple[pd.Timestamp, float, float]]:
         if not self.has_next():
             return None
-        ts = self._times[self._iter_idx]
-        row = self.trade_df.loc[ts]
-        return ts, float(row["Open"]), float(row["Volume"])
+        i = self._iter_idx
+        return self._times[i], float(self._open[i]), float(self._volume[i])
 
-    def commit_close_and_advance(self) -> Optional[Tuple[pd.Timestamp, float]]:
+    def commit_bar_and_advance(self) -> Optional[Tuple[pd.Timestamp, float, float, float, float]]:
         """
-        Reveal the close for the current bar, then advance to the next.
+        Reveal the full bar (ts, open, high, low, close), then advance to the next.
         """
-        if self._iter_idx >= len(self._times):
+        i = self._iter_idx
+        if i >= len(self._times):
             return None
-        ts = self._times[self._iter_idx]
-        close_val = float(self.trade_df.loc[ts]["Close"])
         self._iter_idx += 1
-        return ts, close_val
+        return (self._times[i], float(self._open[i]), float(self._high[i]),
+                float(self._low[i]), float(self._close[i]))
+
+    def commit_close_and_advance(self) -> Optional[Tuple[pd.Timestamp, float]]:
+        """
+        Reveal the close for the current bar, then advance to the next.
+        """
+        bar = self.commit_bar_and_advance()
+        return None if bar is None else (bar[0], bar[4])
 
     def get_bar(self, ts: pd.Timestamp) -> pd.Series:
         return self.trade_df.loc[ts]
\ No newline at end of file
@@ -0,0 +1,216 @@
+# monte_carlo.py
+"""
+Monte Carlo robustness test of the deterministic trading policy.
+
+Trading-day bars are rebuilt from block-bootstrapped bar returns of the real
+session (the context day is kept as-is), and each synthetic path is traded
+by a headless TraderAgent. The P&L and drawdown distributions show whether a
+good day was skill or luck.
+
+    python monte_carlo.py HUDCO.NS --sims 2000 --block 12 --workers 8 --seed 7 --out results/mc
+    python monte_carlo.py HUDCO.NS --csv data/HUDCO_NS_5m_....csv --sims 500
+"""
+from __future__ import annotations
+import argparse
+import io
+import contextlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+from market import StreamCursor, download_and_prepare
+from journal import TradingJournal
+from trader_agent import TraderAgent
+
+
+# Columns of the shared per-bar feature matrix
+LOG_RET, GAP, HIGH_RATIO, LOW_RATIO, VOLUME = range(5)
+N_FEATURES = 5
+
+METRICS = ("total_pnl", "return_pct", "max_drawdown", "max_drawdown_pct", "sharpe",
+           "trades", "win_rate", "fees_paid")
+
+
+def bar_features(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Split `df` like StreamCursor and describe each trading bar relative to the
+    previous close: log return, open gap, high/low as multiples of the body, volume.
+    """
+    stream = StreamCursor(df)
+    prev_close = np.r_[stream.context_df["Close"].iloc[-1], stream._close[:-1]]
+    body_hi = np.maximum(stream._open, stream._close)
+    body_lo = np.minimum(stream._open, stream._close)
+    features = np.empty((len(stream._close), N_FEATURES))
+    features[:, LOG_RET] = np.log(stream._close / prev_close)
+    features[:, GAP] = stream._open / prev_close
+    features[:, HIGH_RATIO] = stream._high / body_hi
+    features[:, LOW_RATIO] = stream._low / body_lo
+    features[:, VOLUME] = stream._volume
+    return {
+        "context": stream.context_df[["Open", "High", "Low", "Close", "Volume"]],
+        "times": stream.trade_df.index,
+        "start_close": float(prev_close[0]),
+        "features": features,
+    }
+
+
+def block_bootstrap(n: int, block: int, rng: np.random.Generator) -> np.ndarray:
+    """Indices of n bars built from random contiguous blocks of `block` bars."""
+    block = max(1, min(block, n))
+    starts = rng.integers(0, n - block + 1, size=-(-n // block))
+    return (starts[:, None] + np.arange(block)).ravel()[:n]
+
+
+def synthetic_bars(features: np.ndarray, idx: np.ndarray, start_close: float, times) -> pd.DataFrame:
+    """Rebuild OHLCV bars along resampled bar indices (vectorized)."""
+    f = features[idx]
+    close = start_close * np.exp(np.cumsum(f[:, LOG_RET]))
+    prev_close = np.r_[start_close, close[:-1]]
+    open_ = prev_close * f[:, GAP]
+    high = np.maximum(open_, close) * f[:, HIGH_RATIO]
+    low = np.minimum(open_, close) * f[:, LOW_RATIO]
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": f[:, VOLUME]},
+                        index=times)
+
+
+# ------------------------
+# Worker side
+# ------------------------
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(shm_name: str, shape, context: pd.DataFrame, times, start_close: float,
+                 ticker: str, starting_cash: float, block: int):
+    """Attach the shared feature matrix read-only and build one reusable headless agent."""
+    # Pool workers share the parent's resource tracker; the parent unlinks the block
+    shm = shared_memory.SharedMemory(name=shm_name)
+    features = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    features.flags.writeable = False
+    _WORKER.update(shm=shm, features=features, context=context, times=times, start_close=start_close,
+                   ticker=ticker, starting_cash=starting_cash, block=block,
+                   agent=TraderAgent(use_llm=False, headless=True, journal_path=Path(":memory:"),
+                                     checkpoint_every=0))
+
+
+def _simulate(seed: np.random.SeedSequence) -> Dict[str, Any]:
+    w = _WORKER
+    rng = np.random.default_rng(seed)
+    features = w["features"]
+    idx = block_bootstrap(len(features), w["block"], rng)
+    df = pd.concat([w["context"], synthetic_bars(features, idx, w["start_close"], w["times"])])
+
+    agent = w["agent"]
+    agent.journal = TradingJournal(Path(":memory:"))  # fresh per run; the journal is append-only
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent.initialize_from_df(w["ticker"], df, w["starting_cash"])
+        while not agent.step_once().get("done"):
+            pass
+    agent.journal.close()
+
+    portfolio = agent.state.portfolio
+    risk = portfolio.risk_stats()
+    lots = portfolio.trade_stats()
+    return {
+        "sim": int(seed.spawn_key[-1]),
+        "total_pnl": round(portfolio.total_pnl(), 2),
+        "return_pct": risk["return_pct"],
+        "max_drawdown": risk["max_drawdown"],
+        "max_drawdown_pct": risk["max_drawdown_pct"],
+        "sharpe": risk["sharpe"],
+        "trades": len(portfolio.trade_log),
+        "win_rate": lots["win_rate"],
+        "fees_paid": round(portfolio.fees_paid, 2),
+    }
+
+
+# ------------------------
+# Driver
+# ------------------------
+def run_monte_carlo(df: pd.DataFrame, ticker: str, n_sims: int = 1000, starting_cash: float = 10000.0,
+                    block: int = 12, seed: int = 0, workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Run `n_sims` bootstrapped sessions across a process pool; one row of metrics per run.
+    Each run gets its own child of SeedSequence(seed), so results do not depend on
+    the worker count or scheduling.
+    """
+    base = bar_features(df)
+    features = base["features"]
+    seeds = np.random.SeedSequence(seed).spawn(n_sims)
+    workers = workers or os.cpu_count() or 1
+
+    shm = shared_memory.SharedMemory(create=True, size=max(features.nbytes, 1))
+    try:
+        np.ndarray(features.shape, dtype=np.float64, buffer=shm.buf)[:] = features
+        init_args = (shm.name, features.shape, base["context"], base["times"], base["start_close"],
+                     ticker, starting_cash, block)
+        chunksize = max(1, n_sims // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+            rows = list(pool.map(_simulate, seeds, chunksize=chunksize))
+    finally:
+        shm.close()
+        shm.unlink()
+    return pd.DataFrame(rows)
+
+
+def summarize(runs: pd.DataFrame) -> Dict[str, Any]:
+    """Distribution summary (mean, std and percentiles) of every metric."""
+    summary: Dict[str, Any] = {"sims": len(runs)}
+    for metric in METRICS:
+        values = runs[metric].to_numpy(dtype=np.float64)
+        p5, p25, p50, p75, p95 = np.percentile(values, [5, 25, 50, 75, 95])
+        summary[metric] = {
+            "mean": round(float(values.mean()), 4), "std": round(float(values.std(ddof=1)), 4) if len(values) > 1 else 0.0,
+            "p5": round(p5, 4), "p25": round(p25, 4), "p50": round(p50, 4), "p75": round(p75, 4), "p95": round(p95, 4),
+        }
+    summary["prob_loss"] = round(float((runs["total_pnl"] < 0).mean()), 4)
+    return summary
+
+
+def _load_bars(ticker: str, csv: Optional[str]) -> pd.DataFrame:
+    if csv:
+        df = pd.read_csv(csv, index_col=0)
+        df.index = pd.to_datetime(df.index, utc=True).tz_convert("Asia/Kolkata")
+        return df
+    df, _ = download_and_prepare(ticker, Path("data"))
+    return df
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Monte Carlo robustness test of the trading policy.")
+    parser.add_argument("ticker", help="NSE ticker like HUDCO.NS")
+    parser.add_argument("--csv", help="Prepared OHLCV CSV (default: download recent bars)")
+    parser.add_argument("--sims", type=int, default=1000, help="Number of simulated sessions")
+    parser.add_argument("--block", type=int, default=12, help="Bootstrap block length in bars")
+    parser.add_argument("--cash", type=float, default=10000.0, help="Starting cash per session")
+    parser.add_argument("--seed", type=int, default=0, help="Root seed")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--out", default="results/monte_carlo", help="Output directory")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    runs = run_monte_carlo(_load_bars(args.ticker, args.csv), args.ticker, args.sims, args.cash,
+                           args.block, args.seed, args.workers)
+    summary = summarize(runs)
+    summary["elapsed_sec"] = round(time.perf_counter() - started, 2)
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    (out / "summary.json").write_text(json.dumps(summary, indent=2))
+    try:
+        runs.to_parquet(out / "runs.parquet", index=False)
+    except ImportError:
+        runs.to_csv(out / "runs.csv", index=False)
+    pnl, dd = summary["total_pnl"], summary["max_drawdown_pct"]
+    print(f"🎲 {args.sims} sims in {summary['elapsed_sec']}s | PnL p5/p50/p95 = "
+          f"₹{pnl['p5']}/₹{pnl['p50']}/₹{pnl['p95']} | P(loss)={summary['prob_loss']:.1%} | "
+          f"MaxDD p95={dd['p95']}%")
+
+
+if __name__ == "__main__":
+    main()
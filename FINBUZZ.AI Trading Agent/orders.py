@@ -0,0 +1,233 @@
+# orders.py
+from __future__ import annotations
+import heapq
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+
+LIMIT = "LIMIT"
+STOP = "STOP"
+STOP_LIMIT = "STOP_LIMIT"
+ORDER_KINDS = (LIMIT, STOP, STOP_LIMIT)
+
+OPEN = "OPEN"
+FILLED = "FILLED"
+CANCELLED = "CANCELLED"
+REJECTED = "REJECTED"
+
+
+@dataclass
+class Order:
+    id: int
+    side: str                    # "BUY" or "SELL"
+    kind: str                    # LIMIT, STOP or STOP_LIMIT
+    qty: int
+    limit: Optional[float]       # LIMIT / STOP_LIMIT price
+    stop: Optional[float]        # STOP / STOP_LIMIT trigger
+    placed_ts: str = ""
+    oco: Optional[int] = None    # one-cancels-other group id
+    tag: str = ""
+    status: str = OPEN
+    triggered: bool = False      # STOP_LIMIT whose stop has fired (now resting as a limit)
+    fill_price: Optional[float] = None
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class OrderBook:
+    """
+    Resting limit, stop and stop-limit orders matched against each bar's OHLC.
+
+    Four price-keyed heaps hold the orders, each ordered so the order closest to
+    triggering is on top: buy limits (highest first), sell limits (lowest
+    first), buy stops (lowest first) and sell stops (highest first). Matching a
+    bar pops only triggered orders, O(log n) each; cancels are lazy (the entry
+    is discarded when it reaches the top).
+
+    Fill prices assume the worst intrabar path the bar allows: an order already
+    through at the Open fills at the Open (gap), otherwise at its own price;
+    stops are processed before limits, so when a bar touches both legs of an
+    OCO bracket the stop wins.
+    """
+    def __init__(self):
+        self._orders: Dict[int, Order] = {}
+        self._next_id = 1
+        self._next_oco = 1
+        self._oco: Dict[int, Set[int]] = {}
+        self._seq = 0  # FIFO tie-break between orders at the same price
+        # heap entries: (key, seq, order_id)
+        self._buy_limits: List[Tuple[float, int, int]] = []
+        self._sell_limits: List[Tuple[float, int, int]] = []
+        self._buy_stops: List[Tuple[float, int, int]] = []
+        self._sell_stops: List[Tuple[float, int, int]] = []
+
+    # ------------------------
+    # Placement
+    # ------------------------
+    def place(self, side: str, kind: str, qty: int, limit: Optional[float] = None, stop: Optional[float] = None,
+              ts: str = "", oco: Optional[int] = None, tag: str = "") -> Order:
+        side, kind = side.upper(), kind.upper()
+        if side not in ("BUY", "SELL"):
+            raise ValueError(f"Invalid side {side}")
+        if kind not in ORDER_KINDS:
+            raise ValueError(f"Unknown order kind {kind}; expected one of {ORDER_KINDS}")
+        if qty <= 0:
+            raise ValueError("Order qty must be positive")
+        if kind in (LIMIT, STOP_LIMIT) and not limit:
+            raise ValueError(f"{kind} order needs a limit price")
+        if kind in (STOP, STOP_LIMIT) and not stop:
+            raise ValueError(f"{kind} order needs a stop price")
+
+        order = Order(self._next_id, side, kind, int(qty), limit, stop, ts, oco, tag)
+        self._next_id += 1
+        self._orders[order.id] = order
+        if oco is not None:
+            self._oco.setdefault(oco, set()).add(order.id)
+        if kind == LIMIT:
+            self._push_limit(order)
+        else:
+            self._push_stop(order)
+        return order
+
+    def bracket(self, qty: int, take_profit: float, stop_loss: float, ts: str = "", tag: str = "") -> Tuple[Order, Order]:
+        """OCO exit pair for a long position: sell limit at take_profit, sell stop at stop_loss."""
+        if not stop_loss < take_profit:
+            raise ValueError("Bracket needs stop_loss < take_profit")
+        group = self._next_oco
+        self._next_oco += 1
+        tp = self.place("SELL", LIMIT, qty, limit=take_profit, ts=ts, oco=group, tag=tag)
+        sl = self.place("SELL", STOP, qty, stop=stop_loss, ts=ts, oco=group, tag=tag)
+        return tp, sl
+
+    def _push_limit(self, order: Order):
+        self._seq += 1
+        if order.side == "BUY":
+            heapq.heappush(self._buy_limits, (-order.limit, self._seq, order.id))
+        else:
+            heapq.heappush(self._sell_limits, (order.limit, self._seq, order.id))
+
+    def _push_stop(self, order: Order):
+        self._seq += 1
+        if order.side == "BUY":
+            heapq.heappush(self._buy_stops, (order.stop, self._seq, order.id))
+        else:
+            heapq.heappush(self._sell_stops, (-order.stop, self._seq, order.id))
+
+    # ------------------------
+    # Cancels / queries
+    # ------------------------
+    def cancel(self, order_id: int) -> bool:
+        order = self._orders.get(order_id)
+        if order is None or order.status != OPEN:
+            return False
+        order.status = CANCELLED
+        self._release(order)
+        return True
+
+    def cancel_all(self, side: Optional[str] = None, tag: Optional[str] = None) -> int:
+        n = 0
+        for order in list(self._orders.values()):
+            if (side is None or order.side == side.upper()) and (tag is None or order.tag == tag):
+                n += self.cancel(order.id)
+        return n
+
+    def get(self, order_id: int) -> Optional[Order]:
+        return self._orders.get(order_id)
+
+    def open_orders(self) -> List[Order]:
+        # Finished orders are released immediately, so every tracked order is open
+        return list(self._orders.values())
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def _release(self, order: Order):
+        """Forget a finished order (heap entries are dropped lazily)."""
+        self._orders.pop(order.id, None)
+        if order.oco is not None:
+            group = self._oco.get(order.oco)
+            if group is not None:
+                group.discard(order.id)
+                if not group:
+                    del self._oco[order.oco]
+
+    def _pop_live(self, heap: List[Tuple[float, int, int]]) -> Optional[Order]:
+        while heap:
+            order = self._orders.get(heapq.heappop(heap)[2])
+            if order is not None and order.status == OPEN:
+                return order
+        return None
+
+    def _top(self, heap: List[Tuple[float, int, int]]) -> Optional[float]:
+        # Drop stale (cancelled/filled) entries from the top
+        while heap:
+            order = self._orders.get(heap[0][2])
+            if order is not None and order.status == OPEN:
+                return heap[0][0]
+            heapq.heappop(heap)
+        return None
+
+    # ------------------------
+    # Matching
+    # ------------------------
+    def match_bar(self, o: float, h: float, l: float, c: float,
+                  execute: Callable[[Order, float], bool]) -> List[Order]:
+        """
+        Match resting orders against one bar. `execute(order, price)` books the
+        fill and returns False to reject it (e.g. insufficient cash); filled
+        orders cancel their OCO siblings. Returns the filled orders.
+        """
+        hits: List[Tuple[Order, float]] = []
+        rearmed: List[Order] = []
+
+        # Stops first (worst case when a bar touches both legs of a bracket)
+        while (key := self._top(self._sell_stops)) is not None and -key >= l:
+            order = self._pop_live(self._sell_stops)
+            self._trigger(order, min(o, order.stop), hits, rearmed)
+        while (key := self._top(self._buy_stops)) is not None and key <= h:
+            order = self._pop_live(self._buy_stops)
+            self._trigger(order, max(o, order.stop), hits, rearmed)
+
+        while (key := self._top(self._buy_limits)) is not None and -key >= l:
+            order = self._pop_live(self._buy_limits)
+            hits.append((order, min(o, order.limit)))
+        while (key := self._top(self._sell_limits)) is not None and key <= h:
+            order = self._pop_live(self._sell_limits)
+            hits.append((order, max(o, order.limit)))
+
+        # Gap fills at the Open happened first
+        hits.sort(key=lambda hit: hit[1] != o)
+        filled: List[Order] = []
+        for order, price in hits:
+            if order.status != OPEN:
+                continue  # an OCO sibling already filled this bar
+            if not execute(order, price):
+                order.status = REJECTED
+                self._release(order)
+                continue
+            order.status = FILLED
+            order.fill_price = price
+            filled.append(order)
+            for sibling in list(self._oco.get(order.oco, ())) if order.oco is not None else ():
+                if sibling != order.id:
+                    self.cancel(sibling)
+            self._release(order)
+
+        # Stop-limits that gapped through their limit rest as limits from the next bar
+        for order in rearmed:
+            if order.status == OPEN:
+                self._push_limit(order)
+        return filled
+
+    def _trigger(self, order: Order, trigger_price: float,
+                 hits: List[Tuple[Order, float]], rearmed: List[Order]):
+        if order.kind == STOP:
+            hits.append((order, trigger_price))
+            return
+        order.triggered = True
+        marketable = trigger_price >= order.limit if order.side == "SELL" else trigger_price <= order.limit
+        if marketable:
+            hits.append((order, trigger_price))
+        else:
+            rearmed.append(order)
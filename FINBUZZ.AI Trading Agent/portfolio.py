@@ -1,7 +1,14 @@
 # portfolio.py
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Optional, List, Dict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Iterator, Mapping, Tuple, Union
+import numpy as np
+
+from arrays import GrowableArray
+from costs import NseCostModel
+from lots import LotBook, FIFO
+from equity import EquityCurve
 
 
 @dataclass
@@ -10,6 +17,126 @@ class Fill:
     side: str  # "BUY" or "SELL"
     qty: int
     price: float
+    pnl: float = 0.0  # realized P&L matched by the lot engine (SELL only), net of fees
+    fees: float = 0.0  # brokerage, taxes and exchange charges paid on this fill
+
+
+BUY, SELL = 1, -1
+SIDE_CODES = {"BUY": BUY, "SELL": SELL}
+SIDE_NAMES = {BUY: "BUY", SELL: "SELL"}
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NAIVE = -32768  # tz offset sentinel for naive timestamps
+
+
+def _to_epoch_ns(ts) -> tuple:
+    """(epoch ns, utc offset minutes) for an ISO string or datetime."""
+    dt = ts if isinstance(ts, datetime) else datetime.fromisoformat(str(ts))
+    offset = dt.utcoffset()
+    if offset is None:
+        dt, offset_min = dt.replace(tzinfo=timezone.utc), _NAIVE
+    else:
+        offset_min = int(offset.total_seconds() // 60)
+    delta = dt - _EPOCH
+    ns = (delta.days * 86400 + delta.seconds) * 10**9 + delta.microseconds * 1000
+    return ns + getattr(dt, "nanosecond", 0), offset_min
+
+
+def _from_epoch_ns(ns: int, offset_min: int) -> str:
+    tz = timezone.utc if offset_min == _NAIVE else timezone(timedelta(minutes=offset_min))
+    dt = datetime.fromtimestamp(ns // 10**9, tz) + timedelta(microseconds=(ns % 10**9) // 1000)
+    if offset_min == _NAIVE:
+        dt = dt.replace(tzinfo=None)
+    return dt.isoformat()
+
+
+class FillLog:
+    """
+    Columnar, append-optimized fill store: int64 epoch-ns timestamps, int8 side
+    (+1 BUY / -1 SELL), int64 qty, float64 price, realized P&L and fees in
+    growable arrays (~51 bytes per fill). Indexing and iteration yield `Fill` objects, so it can stand in for
+    the old list of Fill dataclasses; analytics should use `columns()` instead.
+    Buy/sell counts and the cumulative realized P&L are kept as running totals
+    on `record`, so dashboards never rescan the log.
+    """
+    def __init__(self, capacity: int = 64):
+        self.ts = GrowableArray(np.int64, capacity)
+        self.tz_offset = GrowableArray(np.int16, capacity)
+        self.side = GrowableArray(np.int8, capacity)
+        self.qty = GrowableArray(np.int64, capacity)
+        self.price = GrowableArray(np.float64, capacity)
+        self.pnl = GrowableArray(np.float64, capacity)
+        self.fees = GrowableArray(np.float64, capacity)
+        self.cum_pnl = GrowableArray(np.float64, capacity)  # realized P&L after each fill
+        self.buys = 0
+        self.sells = 0
+
+    def record(self, ts, side: str, qty: int, price: float, pnl: float = 0.0, fees: float = 0.0) -> int:
+        """Append a fill; returns its epoch-ns timestamp."""
+        ns, offset_min = _to_epoch_ns(ts)
+        self.ts.append(ns)
+        self.tz_offset.append(offset_min)
+        self.side.append(SIDE_CODES[side])
+        self.qty.append(qty)
+        self.price.append(price)
+        self.pnl.append(pnl)
+        self.fees.append(fees)
+        self.cum_pnl.append((float(self.cum_pnl[-1]) if self.cum_pnl else 0.0) + pnl)
+        if side == "BUY":
+            self.buys += 1
+        else:
+            self.sells += 1
+        return ns
+
+    def append(self, fill: Fill):
+        self.record(fill.ts, fill.side, fill.qty, fill.price, fill.pnl, fill.fees)
+
+    def __len__(self) -> int:
+        return len(self.side)
+
+    def __bool__(self) -> bool:
+        return len(self.side) > 0
+
+    def _fill(self, i: int) -> Fill:
+        return Fill(
+            ts=_from_epoch_ns(int(self.ts[i]), int(self.tz_offset[i])),
+            side=SIDE_NAMES[int(self.side[i])],
+            qty=int(self.qty[i]),
+            price=float(self.price[i]),
+            pnl=float(self.pnl[i]),
+            fees=float(self.fees[i]),
+        )
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self._fill(i) for i in range(*idx.indices(len(self)))]
+        n = len(self)
+        if idx < 0:
+            idx += n
+        if not 0 <= idx < n:
+            raise IndexError("fill index out of range")
+        return self._fill(idx)
+
+    def __iter__(self) -> Iterator[Fill]:
+        for i in range(len(self)):
+            yield self._fill(i)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Zero-copy column views: ts (epoch ns), side (+1/-1), qty, price, pnl, fees, cum_pnl."""
+        return {"ts": self.ts.view, "side": self.side.view, "qty": self.qty.view,
+                "price": self.price.view, "pnl": self.pnl.view, "fees": self.fees.view,
+                "cum_pnl": self.cum_pnl.view}
+
+    def wall_times(self) -> np.ndarray:
+        """Local wall-clock fill times as datetime64[ns] (for plotting)."""
+        offsets = self.tz_offset.view.astype(np.int64)
+        offsets = np.where(offsets == _NAIVE, 0, offsets)
+        return (self.ts.view + offsets * 60 * 10**9).astype("datetime64[ns]")
+
+    @property
+    def nbytes(self) -> int:
+        return sum(col.nbytes for col in (self.ts, self.tz_offset, self.side, self.qty, self.price, self.pnl, self.fees,
+                                         self.cum_pnl))
 
 
 @dataclass
@@ -19,7 +146,18 @@ class Portfolio:
     avg_cost: float = 0.0
     realized_pnl: float = 0.0
     last_price: float = 0.0
-    trade_log: List[Fill] = field(default_factory=list)
+    trade_log: FillLog = field(default_factory=FillLog)
+    lot_method: str = FIFO
+    cost_model: Optional[NseCostModel] = None  # None = frictionless fills at the quoted price
+    fees_paid: float = 0.0
+    lots: LotBook = field(init=False)
+    equity_curve: EquityCurve = field(init=False)
+    version: int = field(default=0, init=False)  # bumped by every fill and price change
+    _snapshot: Optional[Tuple[int, Dict]] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.lots = LotBook(self.lot_method)
+        self.equity_curve = EquityCurve(self.value())
 
     def value(self) -> float:
         return self.cash + self.shares * self.last_price
@@ -30,43 +168,79 @@ class Portfolio:
     def unrealized_pnl(self) -> float:
         return (self.last_price - self.avg_cost) * self.shares if self.shares > 0 else 0.0
 
-    def can_buy(self, qty: int, price: float) -> bool:
-        return qty > 0 and self.cash >= qty * price
+    def quote(self, side: str, qty: int, price: float, volume: Optional[float] = None) -> Tuple[float, float]:
+        """(execution price, fees) for a prospective fill under the cost model."""
+        if self.cost_model is None or qty <= 0:
+            return price, 0.0
+        return self.cost_model.fill(side, qty, price, volume)
+
+    def can_buy(self, qty: int, price: float, fees: float = 0.0) -> bool:
+        return qty > 0 and self.cash >= qty * price + fees
 
     def can_sell(self, qty: int) -> bool:
         return qty > 0 and qty <= self.shares
 
-    def buy(self, ts: str, qty: int, price: float) -> Dict:
-        if not self.can_buy(qty, price):
-            return {"ok": False, "reason": "Insufficient cash or invalid qty"}
-        cost = qty * price
-        # update avg cost
-        new_total_cost = self.avg_cost * self.shares + cost
-        new_shares = self.shares + qty
-        self.avg_cost = new_total_cost / new_shares if new_shares > 0 else 0.0
-        self.shares = new_shares
-        self.cash -= cost
-        self.trade_log.append(Fill(ts=ts, side="BUY", qty=qty, price=price))
-        return {"ok": True}
+    def buy(self, ts: str, qty: int, price: float, volume: Optional[float] = None) -> Dict:
+        exec_price, fees = self.quote("BUY", qty, price, volume)
+        return self.apply_fill(ts, "BUY", qty, exec_price, fees)
+
+    def sell(self, ts: str, qty: int, price: float, volume: Optional[float] = None) -> Dict:
+        exec_price, fees = self.quote("SELL", qty, price, volume)
+        return self.apply_fill(ts, "SELL", qty, exec_price, fees)
+
+    def apply_fill(self, ts: str, side: str, qty: int, exec_price: float, fees: float = 0.0) -> Dict:
+        """
+        Book a fill at an already-costed execution price (used directly by journal replay).
+        Buy fees are capitalized into the lot cost and sell fees reduce proceeds,
+        so lot P&L and avg_cost are net of all charges.
+        """
+        if side == "BUY":
+            if not self.can_buy(qty, exec_price, fees):
+                return {"ok": False, "reason": "Insufficient cash or invalid qty"}
+            ts_ns = self.trade_log.record(ts, "BUY", qty, exec_price, fees=fees)
+            self.lots.open(ts_ns, qty, exec_price + fees / qty)
+            # avg cost of the open lots
+            self.shares += qty
+            self.avg_cost = self.lots.avg_cost()
+            self.cash -= qty * exec_price + fees
+            self.fees_paid += fees
+            self.version += 1
+            return {"ok": True, "price": exec_price, "fees": fees}
 
-    def sell(self, ts: str, qty: int, price: float) -> Dict:
         if not self.can_sell(qty):
             return {"ok": False, "reason": "Insufficient shares or invalid qty"}
-        proceeds = qty * price
-        # realized pnl on portion sold
-        self.realized_pnl += (price - self.avg_cost) * qty
+        # realized pnl on portion sold, matched against open lots
+        ts_ns, _ = _to_epoch_ns(ts)
+        pnl, closed = self.lots.close(ts_ns, qty, exec_price - fees / qty)
+        self.trade_log.record(ts, "SELL", qty, exec_price, pnl, fees)
+        self.realized_pnl += pnl
         self.shares -= qty
-        self.cash += proceeds
-        if self.shares == 0:
-            self.avg_cost = 0.0
-        self.trade_log.append(Fill(ts=ts, side="SELL", qty=qty, price=price))
-        return {"ok": True}
+        self.cash += qty * exec_price - fees
+        self.fees_paid += fees
+        self.avg_cost = self.lots.avg_cost()
+        self.version += 1
+        return {"ok": True, "pnl": pnl, "price": exec_price, "fees": fees,
+                "holding_minutes": round(sum(l.holding_seconds * l.qty for l in closed) / qty / 60, 2)}
 
     def mark(self, price: float):
-        self.last_price = price
+        if price != self.last_price:
+            self.last_price = price
+            self.version += 1
+
+    def record_bar(self, ts):
+        """Append this bar's equity (call once per bar, after marking the close)."""
+        ts_ns, _ = _to_epoch_ns(ts)
+        self.equity_curve.record(ts_ns, self.value(), self.shares > 0)
+
+    def risk_stats(self) -> Dict:
+        """Equity, drawdown, volatility, Sharpe/Sortino and exposure time (O(1))."""
+        return self.equity_curve.stats()
 
     def snapshot(self) -> Dict:
-        return {
+        """Rounded position summary, memoized per `version`; treat it as read-only."""
+        if self._snapshot is not None and self._snapshot[0] == self.version:
+            return self._snapshot[1]
+        snap = {
             "cash": round(self.cash, 2),
             "shares": int(self.shares),
             "avg_cost": round(self.avg_cost, 4),
@@ -74,4 +248,205 @@ class Portfolio:
             "realized_pnl": round(self.realized_pnl, 2),
             "unrealized_pnl": round(self.unrealized_pnl(), 2),
             "total_pnl": round(self.total_pnl(), 2),
+            "fees_paid": round(self.fees_paid, 2),
+        }
+        self._snapshot = (self.version, snap)
+        return snap
+
+    def trade_stats(self) -> Dict:
+        """Closed-trade statistics (win/loss, holding period) from the lot engine."""
+        return self.lots.stats()
+
+
+class MultiAssetPortfolio:
+    """
+    Long-only portfolio over many symbols with positions stored in NumPy arrays
+    indexed by symbol id. Aggregates (market value, cost basis, realized P&L) are
+    maintained incrementally, so value/exposure/P&L queries are O(1) and marking
+    every symbol from a price vector is one vectorized pass.
+    """
+    def __init__(self, cash: float, capacity: int = 64, lot_method: str = FIFO):
+        self.cash = float(cash)
+        self.lots = LotBook(lot_method)
+        self.symbols: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._shares = GrowableArray(np.int64, capacity)
+        self._cost = GrowableArray(np.float64, capacity)       # total cost basis of open shares
+        self._last = GrowableArray(np.float64, capacity)
+        self._realized = GrowableArray(np.float64, capacity)
+        self._market_value = 0.0
+        self._cost_basis = 0.0
+        self._realized_pnl = 0.0
+        self._open_positions = 0
+        self.trade_log = FillLog(capacity)
+        self.fill_symbol = GrowableArray(np.int32, capacity)  # symbol id per trade_log row
+        self.version = 0  # bumped by every fill and mark
+        self._snapshot: Optional[Tuple[int, Dict]] = None
+
+    # ------------------------
+    # Symbols
+    # ------------------------
+    def symbol_id(self, symbol: str) -> int:
+        """Id of `symbol`, registering it on first use."""
+        sid = self._ids.get(symbol)
+        if sid is None:
+            sid = self._ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            for arr in (self._shares, self._cost, self._last, self._realized):
+                arr.append(0)
+        return sid
+
+    def price_vector(self, prices: Mapping[str, float]) -> np.ndarray:
+        """Price array aligned to symbol ids; symbols missing from `prices` are NaN (unchanged)."""
+        ids = [self.symbol_id(sym) for sym in prices]
+        vec = np.full(len(self.symbols), np.nan)
+        vec[ids] = list(prices.values())
+        return vec
+
+    # ------------------------
+    # Trading
+    # ------------------------
+    def can_buy(self, qty: int, price: float) -> bool:
+        return qty > 0 and self.cash >= qty * price
+
+    def can_sell(self, symbol: str, qty: int) -> bool:
+        sid = self._ids.get(symbol)
+        return qty > 0 and sid is not None and qty <= self._shares[sid]
+
+    def buy(self, symbol: str, ts: str, qty: int, price: float) -> Dict:
+        if not self.can_buy(qty, price):
+            return {"ok": False, "reason": "Insufficient cash or invalid qty"}
+        sid = self.symbol_id(symbol)
+        cost = qty * price
+        ts_ns = self.trade_log.record(ts, "BUY", qty, price)
+        self.fill_symbol.append(sid)
+        self.lots.open(ts_ns, qty, price, symbol)
+        self._remark(sid, price)
+        if self._shares[sid] == 0:
+            self._open_positions += 1
+        self._shares[sid] += qty
+        self._cost[sid] += cost
+        self._market_value += qty * price
+        self._cost_basis += cost
+        self.cash -= cost
+        self.version += 1
+        return {"ok": True}
+
+    def sell(self, symbol: str, ts: str, qty: int, price: float) -> Dict:
+        if not self.can_sell(symbol, qty):
+            return {"ok": False, "reason": "Insufficient shares or invalid qty"}
+        sid = self._ids[symbol]
+        shares = int(self._shares[sid])
+        cost = float(self._cost[sid])
+        ts_ns, _ = _to_epoch_ns(ts)
+        pnl, _ = self.lots.close(ts_ns, qty, price, symbol)
+        released = qty * price - pnl  # cost basis of the matched lots
+        self._remark(sid, price)
+        self._shares[sid] = shares - qty
+        self._cost[sid] = cost - released if shares > qty else 0.0
+        if shares == qty:
+            self._open_positions -= 1
+        self._realized[sid] += pnl
+        self._market_value -= qty * price
+        self._cost_basis -= released
+        self._realized_pnl += pnl
+        self.cash += qty * price
+        self.trade_log.record(ts, "SELL", qty, price, pnl)
+        self.fill_symbol.append(sid)
+        self.version += 1
+        return {"ok": True, "pnl": pnl}
+
+    # ------------------------
+    # Marking
+    # ------------------------
+    def mark(self, symbol: str, price: float):
+        """O(1) mark of a single symbol."""
+        self._remark(self.symbol_id(symbol), price)
+
+    def mark_all(self, prices: Union[np.ndarray, Mapping[str, float]]):
+        """Mark every symbol from a price vector aligned to symbol ids (NaN = keep last price)."""
+        if isinstance(prices, Mapping):
+            prices = self.price_vector(prices)
+        prices = np.asarray(prices, dtype=np.float64)
+        last = self._last.view
+        if prices.shape != last.shape:
+            raise ValueError(f"Expected {last.size} prices, got {prices.size}")
+        np.copyto(last, prices, where=~np.isnan(prices))
+        # Recompute exactly once per bar (also clears incremental rounding drift)
+        self._market_value = float(np.dot(self._shares.view, last))
+        self.version += 1
+
+    def _remark(self, sid: int, price: float):
+        self.version += 1
+        self._market_value += int(self._shares[sid]) * (price - float(self._last[sid]))
+        self._last[sid] = price
+
+    # ------------------------
+    # Aggregates (O(1))
+    # ------------------------
+    def market_value(self) -> float:
+        return self._market_value
+
+    def value(self) -> float:
+        return self.cash + self._market_value
+
+    def exposure(self) -> float:
+        """Fraction of portfolio value held in positions (long-only gross exposure)."""
+        total = self.value()
+        return self._market_value / total if total > 0 else 0.0
+
+    def unrealized_pnl(self) -> float:
+        return self._market_value - self._cost_basis
+
+    def realized_pnl(self) -> float:
+        return self._realized_pnl
+
+    def total_pnl(self) -> float:
+        return self._realized_pnl + self.unrealized_pnl()
+
+    # ------------------------
+    # Views
+    # ------------------------
+    def position(self, symbol: str) -> Dict:
+        """Single-symbol snapshot in the same shape as Portfolio.snapshot()."""
+        sid = self._ids[symbol]
+        shares = int(self._shares[sid])
+        last = float(self._last[sid])
+        cost = float(self._cost[sid])
+        avg_cost = cost / shares if shares > 0 else 0.0
+        unrealized = shares * last - cost if shares > 0 else 0.0
+        return {
+            "symbol": symbol,
+            "shares": shares,
+            "avg_cost": round(avg_cost, 4),
+            "last_price": round(last, 4),
+            "realized_pnl": round(float(self._realized[sid]), 2),
+            "unrealized_pnl": round(unrealized, 2),
+        }
+
+    def positions(self) -> Dict[str, np.ndarray]:
+        """Column views (no copies) of all positions, aligned to `symbols`."""
+        return {
+            "shares": self._shares.view,
+            "cost_basis": self._cost.view,
+            "last_price": self._last.view,
+            "realized_pnl": self._realized.view,
+        }
+
+    def snapshot(self) -> Dict:
+        """Portfolio summary, memoized per `version`; treat it as read-only."""
+        if self._snapshot is not None and self._snapshot[0] == self.version:
+            return self._snapshot[1]
+        snap = {
+            "cash": round(self.cash, 2),
+            "symbols": len(self.symbols),
+            "open_positions": self._open_positions,
+            "market_value": round(self._market_value, 2),
+            "total_value": round(self.value(), 2),
+            "exposure_pct": round(self.exposure() * 100, 2),
+            "realized_pnl": round(self._realized_pnl, 2),
+            "unrealized_pnl": round(self.unrealized_pnl(), 2),
+            "total_pnl": round(self.total_pnl(), 2),
         }
+        self._snapshot = (self.version, snap)
+        return snap
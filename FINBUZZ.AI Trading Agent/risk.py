@@ -0,0 +1,223 @@
+# risk.py
+from __future__ import annotations
+import math
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import numpy as np
+
+from arrays import GrowableArray
+
+
+@dataclass(frozen=True)
+class RiskLimits:
+    """Pre-trade limits, all off by default (0 disables a limit). Fractions are of the session's current equity."""
+    max_position_pct: float = 0.0        # position value after a buy, per session
+    max_daily_loss_pct: float = 0.0      # halts new buys in a session for the rest of its day
+    max_symbol_exposure: float = 0.0     # ₹ held in one symbol across all sessions
+    max_gross_exposure: float = 0.0      # ₹ held across all sessions
+    max_total_daily_loss: float = 0.0    # ₹ lost today across all sessions; trips the kill switch
+
+    @classmethod
+    def from_env(cls) -> "RiskLimits":
+        return cls(
+            max_position_pct=float(os.getenv("RISK_MAX_POSITION_PCT", "0")),
+            max_daily_loss_pct=float(os.getenv("RISK_MAX_DAILY_LOSS_PCT", "0")),
+            max_symbol_exposure=float(os.getenv("RISK_MAX_SYMBOL_EXPOSURE", "0")),
+            max_gross_exposure=float(os.getenv("RISK_MAX_GROSS_EXPOSURE", "0")),
+            max_total_daily_loss=float(os.getenv("RISK_MAX_TOTAL_DAILY_LOSS", "0")),
+        )
+
+
+class RiskEngine:
+    """
+    Central pre-trade risk checks for every live session in the process.
+
+    Each session owns a slot in a set of NumPy columns (position value, equity,
+    start-of-day equity, ...); per-symbol and gross exposure and the total daily
+    P&L are kept as running sums, so `check` and `update` are O(1) scalar work
+    and cross-session views (`report`) are single vectorized passes. Released
+    slots are reused, so the columns stay as large as the peak session count.
+    Sells are never blocked: reducing risk is always allowed, even after the
+    kill switch trips.
+    """
+    def __init__(self, limits: Optional[RiskLimits] = None, capacity: int = 16):
+        self.limits = limits or RiskLimits()
+        self._lock = threading.Lock()
+        self.sessions: List[str] = []
+        self._free: List[int] = []  # released slots, reused by register
+        self.symbols: List[str] = []
+        self._symbol_ids: Dict[str, int] = {}
+        self._symbol = GrowableArray(np.int32, capacity)
+        self._active = GrowableArray(np.bool_, capacity)
+        self._halted = GrowableArray(np.bool_, capacity)
+        self._day = GrowableArray(np.int64, capacity)
+        self._shares = GrowableArray(np.int64, capacity)
+        self._position = GrowableArray(np.float64, capacity)   # ₹ market value held
+        self._equity = GrowableArray(np.float64, capacity)
+        self._day_start = GrowableArray(np.float64, capacity)  # equity at the start of the session's day
+        self._symbol_exposure = GrowableArray(np.float64, capacity)
+        self._gross = 0.0
+        self._daily_pnl = 0.0
+        self.killed = False
+        self.kill_reason = ""
+
+    # ------------------------
+    # Sessions
+    # ------------------------
+    def register(self, session_id: str, symbol: str, equity: float, shares: int = 0, price: float = 0.0) -> int:
+        """Add a live session; returns its slot."""
+        with self._lock:
+            sym = self._symbol_ids.get(symbol)
+            if sym is None:
+                sym = self._symbol_ids[symbol] = len(self.symbols)
+                self.symbols.append(symbol)
+                self._symbol_exposure.append(0.0)
+            values = ((self._symbol, sym), (self._active, True), (self._halted, False),
+                      (self._day, -1), (self._shares, 0), (self._position, 0.0),
+                      (self._equity, equity), (self._day_start, equity))
+            if self._free:
+                slot = self._free.pop()
+                self.sessions[slot] = session_id
+                for col, value in values:
+                    col[slot] = value
+            else:
+                slot = len(self.sessions)
+                self.sessions.append(session_id)
+                for col, value in values:
+                    col.append(value)
+            self._set_position(slot, shares, shares * price)
+            return slot
+
+    def release(self, slot: int):
+        """Retire a session; its exposure no longer counts against shared limits."""
+        with self._lock:
+            if not self._active[slot]:
+                return
+            self._set_position(slot, 0, 0.0)
+            self._daily_pnl -= float(self._equity[slot] - self._day_start[slot])
+            self._active[slot] = False
+            self._free.append(slot)
+
+    def _set_position(self, slot: int, shares: int, value: float):
+        delta = float(value - self._position[slot])
+        if delta:
+            self._symbol_exposure[self._symbol[slot]] += delta
+            self._gross += delta
+            self._position[slot] = value
+        self._shares[slot] = shares
+
+    def update(self, slot: int, shares: int, price: float, equity: float, day: Optional[int] = None):
+        """Refresh a session after a fill or mark. A new `day` (e.g. date ordinal) resets its daily P&L."""
+        with self._lock:
+            if not self._active[slot]:
+                return
+            prev_equity = float(self._equity[slot])
+            day_start = float(self._day_start[slot])
+            if day is not None and day != self._day[slot]:
+                self._daily_pnl -= prev_equity - day_start
+                self._day[slot] = day
+                self._day_start[slot] = day_start = prev_equity
+                self._halted[slot] = False
+            self._set_position(slot, shares, shares * price)
+            self._daily_pnl += equity - prev_equity
+            self._equity[slot] = equity
+
+            lim = self.limits
+            if lim.max_daily_loss_pct > 0 and equity - day_start <= -lim.max_daily_loss_pct * day_start:
+                self._halted[slot] = True
+            if lim.max_total_daily_loss > 0 and self._daily_pnl <= -lim.max_total_daily_loss and not self.killed:
+                self.killed = True
+                self.kill_reason = f"total daily loss ₹{-self._daily_pnl:.2f} over limit ₹{lim.max_total_daily_loss:.2f}"
+
+    # ------------------------
+    # Checks
+    # ------------------------
+    def check(self, slot: int, side: str, qty: int, price: float) -> Optional[str]:
+        """None if the order passes every pre-trade limit, else the reason it is blocked."""
+        if side.upper() != "BUY":
+            return None
+        with self._lock:
+            if self.killed:
+                return f"kill switch active ({self.kill_reason})"
+            if self._halted[slot]:
+                return "daily loss limit reached for this session"
+            lim = self.limits
+            notional = qty * price
+            equity = self._equity[slot]
+            if lim.max_position_pct > 0 and self._position[slot] + notional > lim.max_position_pct * equity:
+                return f"position would exceed {lim.max_position_pct:.0%} of equity"
+            if lim.max_symbol_exposure > 0 and \
+                    self._symbol_exposure[self._symbol[slot]] + notional > lim.max_symbol_exposure:
+                return f"{self.symbols[self._symbol[slot]]} exposure would exceed ₹{lim.max_symbol_exposure:.2f}"
+            if lim.max_gross_exposure > 0 and self._gross + notional > lim.max_gross_exposure:
+                return f"gross exposure would exceed ₹{lim.max_gross_exposure:.2f}"
+            return None
+
+    def max_buy_qty(self, slot: int, price: float) -> int:
+        """Largest buy quantity that passes every limit at `price` (0 if buys are blocked)."""
+        if price <= 0:
+            return 0
+        with self._lock:
+            if self.killed or self._halted[slot]:
+                return 0
+            lim = self.limits
+            room = math.inf
+            if lim.max_position_pct > 0:
+                room = min(room, lim.max_position_pct * self._equity[slot] - self._position[slot])
+            if lim.max_symbol_exposure > 0:
+                room = min(room, lim.max_symbol_exposure - self._symbol_exposure[self._symbol[slot]])
+            if lim.max_gross_exposure > 0:
+                room = min(room, lim.max_gross_exposure - self._gross)
+        if room == math.inf:
+            return 2 ** 62
+        return max(int(room // price), 0)
+
+    # ------------------------
+    # Kill switch
+    # ------------------------
+    def kill(self, reason: str = "manual"):
+        """Block every new buy in every session."""
+        with self._lock:
+            self.killed = True
+            self.kill_reason = reason
+
+    def reset_kill(self):
+        with self._lock:
+            self.killed = False
+            self.kill_reason = ""
+
+    # ------------------------
+    # Views
+    # ------------------------
+    def report(self) -> Dict:
+        """Cross-session risk picture (vectorized over all slots)."""
+        with self._lock:
+            active = self._active.view
+            equity = self._equity.view
+            day_pnl = equity - self._day_start.view
+            return {
+                "killed": self.killed,
+                "kill_reason": self.kill_reason,
+                "active_sessions": int(active.sum()),
+                "halted_sessions": [s for s, h in zip(self.sessions, self._halted.view & active) if h],
+                "gross_exposure": round(self._gross, 2) + 0.0,
+                "total_daily_pnl": round(self._daily_pnl, 2) + 0.0,
+                "worst_session_daily_pnl": round(float(day_pnl[active].min()), 2) if active.any() else 0.0,
+                "symbol_exposure": {sym: round(float(v), 2)
+                                    for sym, v in zip(self.symbols, self._symbol_exposure.view) if round(v, 2)},
+            }
+
+
+_ENGINE: Optional[RiskEngine] = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_risk_engine() -> RiskEngine:
+    """Process-wide engine shared by every TraderAgent (limits from RISK_* env vars)."""
+    global _ENGINE
+    with _ENGINE_LOCK:
+        if _ENGINE is None:
+            _ENGINE = RiskEngine(RiskLimits.from_env())
+        return _ENGINE
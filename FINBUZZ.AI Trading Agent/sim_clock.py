@@ -0,0 +1,159 @@
+# sim_clock.py
+from __future__ import annotations
+import threading
+import time
+from typing import Callable, Optional
+
+
+REALTIME = "realtime"
+ACCELERATED = "accelerated"
+MAX_SPEED = "max"
+
+BAR_SECONDS = 300.0  # market data is 5-minute bars
+
+
+class SimClock:
+    """
+    Drift-free bar scheduler for the trading runner.
+    Bar k is due at anchor + (k - anchor_bar) * interval on the monotonic clock,
+    so a step's own runtime is absorbed instead of being added to every sleep.
+    Modes: real-time (1 bar per `bar_seconds`), N× accelerated, or max speed.
+    """
+    def __init__(self, mode: str = REALTIME, speed: float = 1.0, bar_seconds: float = BAR_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.bar_seconds = bar_seconds
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._mode = REALTIME
+        self._speed = 1.0
+        self._bar = 0
+        self._anchor_bar = 0
+        self._anchor = clock()
+        self._paused = False
+        self._paused_at = 0.0
+        self._parked = False
+        self.set_speed(mode, speed)
+
+    # ------------------------
+    # Configuration
+    # ------------------------
+    @property
+    def mode(self) -> str:
+        return self._mode
+
+    @property
+    def speed(self) -> float:
+        return self._speed
+
+    @property
+    def interval(self) -> float:
+        """Wall seconds between bars."""
+        if self._mode == MAX_SPEED:
+            return 0.0
+        return self.bar_seconds / self._speed
+
+    @property
+    def bar(self) -> int:
+        return self._bar
+
+    @property
+    def paused(self) -> bool:
+        return self._paused
+
+    @property
+    def parked(self) -> bool:
+        """True while the runner is blocked in wait_next (between bars)."""
+        return self._parked
+
+    def set_speed(self, mode: str, speed: float = 1.0):
+        if mode not in (REALTIME, ACCELERATED, MAX_SPEED):
+            raise ValueError(f"Unknown clock mode: {mode}")
+        if mode == ACCELERATED and speed <= 0:
+            raise ValueError("Accelerated speed must be > 0")
+        with self._cond:
+            # Keep the current bar's progress: rescale the time left until it is due
+            ref = self._paused_at if self._paused else self._clock()
+            old_interval = self.interval
+            remaining = max(self._deadline_locked(self._bar) - ref, 0.0)
+            self._mode = mode
+            self._speed = 1.0 if mode == REALTIME else float(speed)
+            scale = self.interval / old_interval if old_interval > 0 else 0.0
+            self._anchor_bar = self._bar
+            self._anchor = ref + remaining * scale
+            self._cond.notify_all()
+
+    # ------------------------
+    # Scheduling
+    # ------------------------
+    def start(self, bar: int = 0):
+        """Anchor the schedule so `bar` is due now."""
+        with self._cond:
+            self._bar = bar
+            self._paused = False
+            self._reanchor_locked()
+            self._cond.notify_all()
+
+    def deadline(self, bar: Optional[int] = None) -> float:
+        with self._cond:
+            return self._deadline_locked(self._bar if bar is None else bar)
+
+    def wait_next(self, stop: threading.Event, poll: float = 0.25) -> bool:
+        """
+        Block until the current bar is due (or while paused).
+        Returns False if `stop` was set while waiting.
+        """
+        with self._cond:
+            self._parked = True
+            try:
+                while not stop.is_set():
+                    if self._paused:
+                        self._cond.wait(poll)
+                        continue
+                    remaining = self._deadline_locked(self._bar) - self._clock()
+                    if remaining <= 0:
+                        return True
+                    self._cond.wait(min(remaining, poll))
+                return False
+            finally:
+                self._parked = False
+
+    def advance(self):
+        """Mark the current bar as done; the next one is due one interval after it."""
+        with self._cond:
+            self._bar += 1
+            # If a step overran by more than a full interval, re-anchor instead of
+            # bursting through the backlog to catch up.
+            if self.interval > 0 and self._clock() - self._deadline_locked(self._bar) > self.interval:
+                self._reanchor_locked()
+
+    def pause(self) -> bool:
+        """Pause the schedule. Returns True if the runner is parked between bars."""
+        with self._cond:
+            if not self._paused:
+                self._paused = True
+                self._paused_at = self._clock()
+            return self._parked
+
+    def resume(self):
+        with self._cond:
+            if self._paused:
+                # Shift the anchor by the paused duration so pacing is preserved
+                self._anchor += self._clock() - self._paused_at
+                self._paused = False
+                self._cond.notify_all()
+
+    def seek(self, bar: int):
+        """Jump the schedule to `bar`, due immediately."""
+        with self._cond:
+            self._bar = bar
+            self._reanchor_locked()
+            if self._paused:
+                self._paused_at = self._clock()
+            self._cond.notify_all()
+
+    def _deadline_locked(self, bar: int) -> float:
+        return self._anchor + (bar - self._anchor_bar) * self.interval
+
+    def _reanchor_locked(self):
+        self._anchor_bar = self._bar
+        self._anchor = self._clock()
@@ -0,0 +1,100 @@
+# telemetry.py
+from __future__ import annotations
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Deque, Dict, Iterator, Optional
+import numpy as np
+
+
+# Stages of TraderAgent.step_once, in execution order, then the chart encode outside the step
+STEP_STAGES = (
+    "data_peek",       # StreamCursor.peek_next_open_volume
+    "indicators",      # _calculate_technical_indicators
+    "snapshot",        # memory / portfolio snapshot for the prompt
+    "llm",             # AutoGen round-trip
+    "policy",          # deterministic fallback decision
+    "order",           # tool_place_order
+    "append_candle",   # Candles.append_live_candle
+    "orders",          # resting order matching at bar close
+    "step",            # whole step_once
+    "figure",          # chart JSON encode, once per chart version on first to_json (usually the UI poll)
+)
+
+
+class StageLatency:
+    """
+    Per-session latency histograms for each stage of a trading step.
+    Keeps the most recent `max_samples` durations per stage (seconds).
+    """
+    def __init__(self, max_samples: int = 10_000):
+        self.max_samples = max_samples
+        self._samples: Dict[str, Deque[float]] = {}
+        self._totals: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.max_samples)
+            samples.append(seconds)
+            self._totals[stage] = self._totals.get(stage, 0.0) + seconds
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Return count/mean/p50/p95/p99/max per stage, in milliseconds."""
+        with self._lock:
+            items = [(stage, np.fromiter(s, dtype=float), self._totals[stage])
+                     for stage, s in self._samples.items() if s]
+
+        out: Dict[str, Dict[str, float]] = {}
+        for stage, arr, total in items:
+            p50, p95, p99 = np.percentile(arr, [50, 95, 99]) * 1000.0
+            out[stage] = {
+                "count": int(arr.size),
+                "mean_ms": round(float(arr.mean()) * 1000.0, 3),
+                "p50_ms": round(float(p50), 3),
+                "p95_ms": round(float(p95), 3),
+                "p99_ms": round(float(p99), 3),
+                "max_ms": round(float(arr.max()) * 1000.0, 3),
+                "total_ms": round(total * 1000.0, 3),
+            }
+        return out
+
+    def bottleneck(self) -> Optional[str]:
+        """Stage (excluding the whole-step span) with the largest cumulative time."""
+        with self._lock:
+            totals = {k: v for k, v in self._totals.items() if k != "step"}
+        return max(totals, key=totals.get) if totals else None
+
+    def dump_json(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        report = {"bottleneck": self.bottleneck(), "stages": self.summary()}
+        path.write_text(json.dumps(report, indent=2))
+        return path
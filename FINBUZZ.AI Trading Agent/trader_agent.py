@@ -7,11 +7,19 @@ import pandas as pd
 from dotenv import load_dotenv
 import asyncio
 import json
+import uuid
 import numpy as np
 
 from market import download_and_prepare, StreamCursor
 from portfolio import Portfolio
-from charting import Candles
+from charting import Candles, NullCandles
+from indicators import StreamingIndicators
+from telemetry import StageLatency
+from checkpoint import Checkpointer, load_checkpoint
+from journal import TradingJournal
+from costs import NseCostModel
+from orders import OrderBook, Order, STOP
+from risk import RiskEngine, get_risk_engine
 
 # --- Microsoft AutoGen imports
 from autogen_agentchat.agents import AssistantAgent
@@ -21,6 +29,16 @@ from autogen_ext.models.openai import OpenAIChatCompletionClient
 
 load_dotenv()
 
+# Streaming indicator -> (chart overlay name, color)
+CHART_OVERLAYS = {
+    "sma_20": ("SMA 20", '#ffff00'),
+    "ema_20": ("EMA 20", '#ff00ff'),
+    "bb_upper": ("BB Upper", '#8888ff'),
+    "bb_lower": ("BB Lower", '#8888ff'),
+}
+VOLUME_UP_COLOR = 'rgba(0, 255, 136, 0.5)'
+VOLUME_DOWN_COLOR = 'rgba(255, 68, 68, 0.5)'
+
 
 @dataclass
 class TradingMemory:
@@ -33,23 +51,29 @@ class TradingMemory:
         self.trade_history.append(trade_data)
         self.update_performance_metrics()
     
+    def closed_trades(self) -> List[Dict]:
+        # Wins/losses are classified on SELLs, whose pnl comes from the portfolio's lot engine
+        return [t for t in self.trade_history if t.get('side') == 'SELL']
+    
     def update_performance_metrics(self):
         if not self.trade_history:
             return
         
         total_trades = len(self.trade_history)
-        profitable_trades = sum(1 for t in self.trade_history if t.get('pnl', 0) > 0)
+        closed = self.closed_trades()
+        profitable_trades = sum(1 for t in closed if t.get('pnl', 0) > 0)
         
         self.performance_metrics.update({
             'total_trades': total_trades,
-            'win_rate': profitable_trades / total_trades if total_trades > 0 else 0,
-            'avg_pnl': sum(t.get('pnl', 0) for t in self.trade_history) / total_trades if total_trades > 0 else 0,
-            'best_trade': max((t.get('pnl', 0) for t in self.trade_history), default=0),
-            'worst_trade': min((t.get('pnl', 0) for t in self.trade_history), default=0)
+            'closed_trades': len(closed),
+            'win_rate': profitable_trades / len(closed) if closed else 0,
+            'avg_pnl': sum(t.get('pnl', 0) for t in closed) / len(closed) if closed else 0,
+            'best_trade': max((t.get('pnl', 0) for t in closed), default=0),
+            'worst_trade': min((t.get('pnl', 0) for t in closed), default=0)
         })
     
     def get_recent_performance(self, last_n: int = 10) -> Dict:
-        recent_trades = self.trade_history[-last_n:] if len(self.trade_history) >= last_n else self.trade_history
+        recent_trades = self.closed_trades()[-last_n:]
         if not recent_trades:
             return {}
         
@@ -72,17 +96,26 @@ class AppState:
     logs: List[str] = field(default_factory=list)
     trading_memory: TradingMemory = field(default_factory=TradingMemory)
     historical_data: List[Dict] = field(default_factory=list)  # Store historical bar data
+    orders: OrderBook = field(default_factory=OrderBook)  # Resting limit/stop orders
+    portfolio_view: Optional[Tuple[Tuple[int, int], Dict]] = field(default=None, repr=False)  # tool_portfolio_state memo
+    latency: StageLatency = field(default_factory=StageLatency)  # Per-stage step timings
+    indicators: StreamingIndicators = field(default_factory=StreamingIndicators)  # Per-bar SMA/EMA/Bollinger/ATR
+    session_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
     # NEW: Manual override flags
     manual_sell_all: bool = field(default=False)
     manual_buy_max: bool = field(default=False)
     last_manual_action: str = field(default="")
+    echo_logs: bool = True  # Print log lines to stdout (off for headless batch runs)
 
     def log(self, msg: str):
         self.logs.append(msg)
-        print(msg)
+        if self.echo_logs:
+            print(msg)
 
 
-def _make_intelligent_policy_prompt(ticker: str) -> str:
+def _make_intelligent_policy_prompt(ticker: str, protective_stop_pct: float = 0.0) -> str:
+    protective = (f"   - A protective stop at -{protective_stop_pct:.1%} from average cost rests in the order book automatically\n"
+                  f"     and fires intrabar without waiting for your next decision\n") if protective_stop_pct > 0 else ""
     return f"""
 You are an AGGRESSIVE and INTELLIGENT intraday trading agent operating on 1-minute bars for {ticker}.
 
@@ -100,6 +133,9 @@ ENHANCED TRADING INTELLIGENCE:
    - Strong buy signals: Open > EMA20, Volume > 2x average, positive price momentum
    - Scale into winners: If existing position profitable, add more on continued strength
    - Quick exits: Cut losses fast if momentum reverses (stop loss at -2% from entry)
+   - Size stop distances with atr_14 (average true range from real bar highs/lows)
+{protective}   - Use resting LIMIT / STOP / STOP_LIMIT orders and OCO brackets for entries and exits
+     away from the Open; they are matched against each bar's range at bar close
 
 2. PATTERN RECOGNITION:
    - Learn from your trading history - avoid repeating losing patterns
@@ -123,6 +159,7 @@ TOOL USAGE SEQUENCE (MANDATORY):
 3. Analyze current market conditions with your historical context
 4. Make informed trading decision based on signals + your learning
 5. place_order() if trading (BUY/SELL with aggressive but smart sizing)  
+   Optionally place_resting_order() / place_bracket() / cancel_order() to manage resting orders
 6. on_bar_close() - Always call this to complete the bar
 
 YOU MUST MAKE TRADING DECISIONS AND PLACE ORDERS. This is a LIVE trading system!
@@ -131,7 +168,10 @@ BE PROFITABLE, AGGRESSIVE, AND LEARN FROM EVERY TRADE. Your goal is to maximize
 
 
 class TraderAgent:
-    def __init__(self, model_name: str = "gpt-4o-mini", use_llm: bool = True):
+    def __init__(self, model_name: str = "gpt-4o-mini", use_llm: bool = True, headless: bool = False,
+                 journal_path: Optional[Path] = None, checkpoint_every: Optional[int] = None,
+                 cost_model: Optional[NseCostModel] = None, risk_engine: Optional[RiskEngine] = None):
+        self.headless = headless
         self.use_llm = str(os.getenv("USE_LLM", "true")).lower() == "true" and use_llm
         
         # Get API key from environment
@@ -156,13 +196,33 @@ class TraderAgent:
         
         self.agent: Optional[AssistantAgent] = None
         self.state: Optional[AppState] = None
+        if checkpoint_every is None:
+            checkpoint_every = int(os.getenv("CHECKPOINT_EVERY_BARS", "10"))
+        self.checkpointer = Checkpointer(Path(os.getenv("CHECKPOINT_DIR", "checkpoints")), every_n_bars=checkpoint_every)
+        self.journal = TradingJournal(Path(journal_path or os.getenv("JOURNAL_PATH", "data/trading_journal.sqlite")))
+        # NSE charges + slippage on every fill; TRANSACTION_COSTS=false trades frictionless
+        if cost_model is None and str(os.getenv("TRANSACTION_COSTS", "true")).lower() == "true":
+            cost_model = NseCostModel()
+        self.cost_model = cost_model
+        # Opt-in sell stop kept under every open position (e.g. PROTECTIVE_STOP_PCT=0.02)
+        self.protective_stop_pct = float(os.getenv("PROTECTIVE_STOP_PCT", "0"))
+        # Chart shows the last CHART_VIEWPORT_BARS bars in full, older history bucketed (0 sends everything)
+        self.chart_viewport_bars = int(os.getenv("CHART_VIEWPORT_BARS", "300")) or None
+        # Pre-trade limits shared with every other session in this process
+        self.risk = risk_engine or get_risk_engine()
+        self.risk_slot: Optional[int] = None
 
     # ------------------------
     # Enhanced Tools for LLM
     # ------------------------
     def tool_portfolio_state(self) -> Dict[str, Any]:
         """Return current portfolio snapshot with enhanced metrics."""
-        base_snapshot = self.state.portfolio.snapshot()
+        # Memoized until a fill, mark or order change; callers must not mutate the result
+        key = (self.state.portfolio.version, len(self.state.orders))
+        cached = self.state.portfolio_view
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        base_snapshot = dict(self.state.portfolio.snapshot())
         
         # Add enhanced metrics
         if self.state.portfolio.last_price > 0:
@@ -170,6 +230,8 @@ class TraderAgent:
             base_snapshot['total_value'] = round(total_value, 2)
             base_snapshot['cash_utilization'] = round((1 - base_snapshot['cash'] / total_value) * 100, 2)
         
+        base_snapshot['open_orders'] = len(self.state.orders)
+        self.state.portfolio_view = (key, base_snapshot)
         return base_snapshot
 
     def tool_get_trading_memory(self) -> Dict[str, Any]:
@@ -179,17 +241,34 @@ class TraderAgent:
             'total_trades': len(memory.trade_history),
             'performance_metrics': memory.performance_metrics,
             'recent_performance': memory.get_recent_performance(10),
+            'lot_stats': self.state.portfolio.trade_stats(),
+            'risk_stats': self.state.portfolio.risk_stats(),
             'last_5_trades': memory.trade_history[-5:] if memory.trade_history else [],
             'historical_bars_count': len(self.state.historical_data)
         }
 
     def tool_place_order(self, side: str, qty: int, price: float, ts_iso: str) -> Dict[str, Any]:
         """Enhanced order placement with trade tracking."""
+        with self.state.latency.span("order"):
+            return self._place_order(side, qty, price, ts_iso)
+
+    def _place_order(self, side: str, qty: int, price: float, ts_iso: str,
+                     bar: Optional[int] = None, sync_stop: bool = True) -> Dict[str, Any]:
+        if self.risk_slot is not None:
+            blocked = self.risk.check(self.risk_slot, side, qty, price)
+            if blocked:
+                self.state.log(f"🛡️ RISK BLOCKED {side.upper()} {qty} @ ₹{price}: {blocked}")
+                return {"ok": False, "reason": f"risk: {blocked}"}
+        # Slippage scales with participation in the bar being traded
+        bar_volume = self.state.historical_data[-1].get('volume') if self.state.historical_data else None
         if side.upper() == "BUY":
-            res = self.state.portfolio.buy(ts_iso, qty, price)
+            res = self.state.portfolio.buy(ts_iso, qty, price, bar_volume)
             if res.get("ok"):
+                price, fees = res["price"], res["fees"]
+                self._journal_fill(ts_iso, "BUY", qty, price, fees, bar)
                 self.state.chart.add_trade_marker(ts_iso, price, "BUY")
-                self.state.log(f"🟢 AGENT BUY {qty} @ ₹{price} [{ts_iso}] - Position: {self.state.portfolio.shares}")
+                self.state.log(f"🟢 AGENT BUY {qty} @ ₹{price} [{ts_iso}] - Fees: ₹{fees:.2f} - "
+                               f"Position: {self.state.portfolio.shares}")
                 
                 # Track trade for learning
                 trade_data = {
@@ -197,40 +276,122 @@ class TraderAgent:
                     'side': 'BUY',
                     'qty': qty,
                     'price': price,
-                    'portfolio_value_before': self.state.portfolio.cash + qty * price
+                    'fees': fees,
+                    'portfolio_value_before': self.state.portfolio.cash + qty * price + fees
                 }
                 self.state.trading_memory.add_trade(trade_data)
         
         elif side.upper() == "SELL":
-            res = self.state.portfolio.sell(ts_iso, qty, price)
+            res = self.state.portfolio.sell(ts_iso, qty, price, bar_volume)
             if res.get("ok"):
+                price, fees = res["price"], res["fees"]
+                self._journal_fill(ts_iso, "SELL", qty, price, fees, bar)
                 self.state.chart.add_trade_marker(ts_iso, price, "SELL")
                 
-                # Calculate PnL for this trade
-                if self.state.portfolio.avg_cost > 0:
-                    pnl = (price - self.state.portfolio.avg_cost) * qty
-                    self.state.log(f"🔴 AGENT SELL {qty} @ ₹{price} [{ts_iso}] - PnL: ₹{pnl:.2f} - Remaining: {self.state.portfolio.shares}")
-                    
-                    # Track trade for learning
-                    trade_data = {
-                        'timestamp': ts_iso,
-                        'side': 'SELL',
-                        'qty': qty,
-                        'price': price,
-                        'pnl': pnl,
-                        'avg_cost': self.state.portfolio.avg_cost
-                    }
-                    self.state.trading_memory.add_trade(trade_data)
-                else:
-                    self.state.log(f"🔴 AGENT SELL {qty} @ ₹{price} [{ts_iso}] - Remaining: {self.state.portfolio.shares}")
+                # Realized PnL for this trade (net of fees), matched against open lots
+                pnl = res["pnl"]
+                self.state.log(f"🔴 AGENT SELL {qty} @ ₹{price} [{ts_iso}] - PnL: ₹{pnl:.2f} (fees ₹{fees:.2f}) - "
+                               f"Held: {res['holding_minutes']:.0f}m - Remaining: {self.state.portfolio.shares}")
+                
+                # Track trade for learning
+                trade_data = {
+                    'timestamp': ts_iso,
+                    'side': 'SELL',
+                    'qty': qty,
+                    'price': price,
+                    'pnl': pnl,
+                    'fees': fees,
+                    'holding_minutes': res['holding_minutes'],
+                    'avg_cost': self.state.portfolio.avg_cost
+                }
+                self.state.trading_memory.add_trade(trade_data)
         else:
             return {"ok": False, "reason": "Invalid side"}
+        if not res.get("ok"):
+            return res
         
+        self._update_risk()
+        if sync_stop:
+            self._sync_protective_stop(ts_iso)
         return {"ok": True, "portfolio": self.tool_portfolio_state()}
 
+    def tool_place_resting_order(self, side: str, kind: str, qty: int,
+                                 limit_price: float = 0.0, stop_price: float = 0.0) -> Dict[str, Any]:
+        """Rest a LIMIT, STOP or STOP_LIMIT order; it is matched against each bar's range at bar close."""
+        try:
+            order = self.state.orders.place(side, kind, qty, limit=limit_price or None, stop=stop_price or None,
+                                            ts=self._session_ts().isoformat())
+        except ValueError as e:
+            return {"ok": False, "reason": str(e)}
+        self.state.log(f"📌 RESTING {order.side} {order.kind} #{order.id} x{order.qty} "
+                       f"limit={order.limit} stop={order.stop}")
+        return {"ok": True, "order": order.to_dict()}
+
+    def tool_place_bracket(self, qty: int, take_profit: float, stop_loss: float) -> Dict[str, Any]:
+        """OCO exit bracket for the long position: sell limit at take_profit, sell stop at stop_loss."""
+        try:
+            tp, sl = self.state.orders.bracket(qty, take_profit, stop_loss, ts=self._session_ts().isoformat())
+        except ValueError as e:
+            return {"ok": False, "reason": str(e)}
+        self.state.log(f"📌 BRACKET x{qty}: target ₹{take_profit} (#{tp.id}) / stop ₹{stop_loss} (#{sl.id})")
+        return {"ok": True, "orders": [tp.to_dict(), sl.to_dict()]}
+
+    def tool_cancel_order(self, order_id: int) -> Dict[str, Any]:
+        """Cancel a resting order by id."""
+        ok = self.state.orders.cancel(int(order_id))
+        return {"ok": ok} if ok else {"ok": False, "reason": f"No open order #{order_id}"}
+
+    def tool_list_orders(self) -> Dict[str, Any]:
+        """List resting orders."""
+        return {"orders": [o.to_dict() for o in self.state.orders.open_orders()]}
+
+    def _update_risk(self, day: Optional[int] = None):
+        if self.risk_slot is not None:
+            portfolio = self.state.portfolio
+            self.risk.update(self.risk_slot, portfolio.shares, portfolio.last_price, portfolio.value(), day)
+
+    def _register_risk(self):
+        self.release_risk()
+        portfolio = self.state.portfolio
+        self.risk_slot = self.risk.register(self.state.session_id, self.state.ticker, portfolio.value(),
+                                            portfolio.shares, portfolio.last_price)
+
+    def release_risk(self):
+        """Stop counting this session's exposure against the shared risk limits."""
+        if self.risk_slot is not None:
+            self.risk.release(self.risk_slot)
+            self.risk_slot = None
+
+    def _sync_protective_stop(self, ts_iso: str):
+        """Keep one sell stop for the whole position at avg_cost * (1 - protective_stop_pct)."""
+        book = self.state.orders
+        book.cancel_all(tag="protective")
+        portfolio = self.state.portfolio
+        if self.protective_stop_pct > 0 and portfolio.shares > 0:
+            stop = round(portfolio.avg_cost * (1 - self.protective_stop_pct), 2)
+            book.place("SELL", STOP, portfolio.shares, stop=stop, ts=ts_iso, tag="protective")
+
+    def _match_resting_orders(self, ts_iso: str, bar: int, o: float, h: float, l: float, c: float):
+        """Fill resting orders the bar traded through, before marking the close."""
+        def execute(order: Order, price: float) -> bool:
+            # Exits never sell more than is held (e.g. the protective stop after a manual sale)
+            qty = order.qty if order.side == "BUY" else min(order.qty, self.state.portfolio.shares)
+            if qty <= 0:
+                return False
+            self._journal_decision(ts_iso, "order_book", order.side, qty,
+                                   f"{order.kind} #{order.id} {order.tag}".strip(), bar)
+            self.state.log(f"⚡ {order.kind} #{order.id} TRIGGERED @ ₹{price}")
+            # The protective stop is re-synced once after matching: replacing it
+            # mid-bar would cancel a stop already triggered by this bar
+            return bool(self._place_order(order.side, qty, price, ts_iso, bar, sync_stop=False).get("ok"))
+
+        if len(self.state.orders) and self.state.orders.match_bar(o, h, l, c, execute):
+            self._sync_protective_stop(ts_iso)
+
     def tool_get_next_open_volume(self) -> Dict[str, Any]:
         """Enhanced next bar data with technical indicators."""
-        nxt = self.state.stream.peek_next_open_volume()
+        with self.state.latency.span("data_peek"):
+            nxt = self.state.stream.peek_next_open_volume()
         if not nxt:
             return {"done": True}
         
@@ -238,7 +399,8 @@ class TraderAgent:
         self.state.portfolio.mark(o)
         
         # Calculate technical indicators from historical data
-        tech_indicators = self._calculate_technical_indicators(o, v)
+        with self.state.latency.span("indicators"):
+            tech_indicators = self._calculate_technical_indicators(o, v)
         
         # Store this bar data for learning
         bar_data = {
@@ -260,19 +422,28 @@ class TraderAgent:
 
     def tool_on_bar_close(self) -> Dict[str, Any]:
         """Enhanced bar close with learning updates."""
-        res = self.state.stream.commit_close_and_advance()
+        res = self.state.stream.commit_bar_and_advance()
         if not res:
             return {"done": True}
         
-        ts, close_val = res
-        o = self.state.portfolio.last_price
-        self.state.chart.append_live_candle(ts, o, close_val)
+        ts, o, high, low, close_val = res
+        with self.state.latency.span("append_candle"):
+            self._chart_bar(ts, o, high, low, close_val, self.state.stream.position - 1)
+        with self.state.latency.span("orders"):
+            self._match_resting_orders(ts.isoformat(), self.state.stream.position - 1, o, high, low, close_val)
         self.state.portfolio.mark(close_val)
+        self.state.portfolio.record_bar(ts)
+        self._update_risk(ts.toordinal())
         
         # Update the last bar with close price
         if self.state.historical_data:
             self.state.historical_data[-1]['close'] = close_val
+            self.state.historical_data[-1]['high'] = high
+            self.state.historical_data[-1]['low'] = low
             self.state.historical_data[-1]['bar_pnl'] = close_val - o
+            self.journal.record_bar(self.state.session_id, self.state.ticker, ts,
+                                    self.state.stream.position - 1, o, high, low, close_val,
+                                    self.state.historical_data[-1].get('volume', 0.0))
         
         snap = self.tool_portfolio_state()
         
@@ -292,6 +463,27 @@ class TraderAgent:
             "performance": perf
         }
 
+    def _chart_bar(self, ts: pd.Timestamp, o: float, h: float, l: float, c: float, bar: int):
+        """Append a closed bar to the chart: candle, volume and the streaming indicator overlays."""
+        chart = self.state.chart
+        chart.append_live_candle(ts, o, c, h, l)
+        chart.add_volume_bar(ts, float(self.state.stream._volume[bar]),
+                             VOLUME_UP_COLOR if c >= o else VOLUME_DOWN_COLOR)
+        values = self.state.indicators.update(c)
+        for key, (name, color) in CHART_OVERLAYS.items():
+            chart.add_technical_indicator(ts, values[key], name, color)
+
+    def _journal_fill(self, ts_iso: str, side: str, qty: int, price: float, fees: float,
+                      bar: Optional[int] = None):
+        self.journal.record_fill(self.state.session_id, self.state.ticker, ts_iso,
+                                 self.state.stream.position if bar is None else bar, side, qty, price, fees)
+
+    def _journal_decision(self, ts_iso: str, source: str, action: str, qty: int, reason: str,
+                          bar: Optional[int] = None):
+        self.journal.record_decision(self.state.session_id, self.state.ticker, ts_iso,
+                                     self.state.stream.position if bar is None else bar,
+                                     source, action, qty, reason)
+
     def _calculate_technical_indicators(self, current_open: float, current_volume: float) -> Dict:
         """Calculate technical indicators from historical data."""
         if len(self.state.historical_data) < 10:
@@ -299,7 +491,8 @@ class TraderAgent:
         
         # Get recent close prices and volumes
         recent_bars = self.state.historical_data[-20:] if len(self.state.historical_data) >= 20 else self.state.historical_data
-        closes = [bar.get('close', bar.get('open', 0)) for bar in recent_bars if bar.get('close') is not None]
+        closed_bars = [bar for bar in recent_bars if bar.get('close') is not None]
+        closes = [bar['close'] for bar in closed_bars]
         volumes = [bar.get('volume', 0) for bar in recent_bars]
         
         if len(closes) < 5:
@@ -318,12 +511,22 @@ class TraderAgent:
         momentum = (current_open - closes[-1]) / closes[-1] * 100 if closes[-1] > 0 else 0
         price_vs_sma5 = (current_open - sma_5) / sma_5 * 100 if sma_5 > 0 else 0
         
+        # Average true range over the last 14 closed bars
+        c = np.array(closes)
+        h = np.array([bar.get('high', bar['close']) for bar in closed_bars])
+        l = np.array([bar.get('low', bar['close']) for bar in closed_bars])
+        prev_c = c[:-1][-14:]
+        true_range = np.maximum(h[1:][-14:], prev_c) - np.minimum(l[1:][-14:], prev_c)
+        atr = float(true_range.mean()) if true_range.size else 0.0
+        
         return {
             "sma_5": round(sma_5, 2),
             "sma_10": round(sma_10, 2), 
             "sma_20": round(sma_20, 2),
             "momentum_pct": round(momentum, 2),
             "price_vs_sma5_pct": round(price_vs_sma5, 2),
+            "atr_14": round(atr, 4),
+            "atr_pct": round(atr / closes[-1] * 100, 3) if closes[-1] > 0 else 0,
             "volume_spike": round(volume_spike, 2),
             "avg_volume": round(avg_volume, 0),
             "trend_signal": "BULLISH" if current_open > sma_5 > sma_10 else "BEARISH" if current_open < sma_5 < sma_10 else "NEUTRAL"
@@ -351,6 +554,12 @@ class TraderAgent:
         if available_cash >= current_price:
             target_cash = available_cash * 0.95
             max_qty = max(1, int(target_cash / current_price))
+            if self.risk_slot is not None:
+                # Size down to what the risk limits allow instead of being rejected outright
+                max_qty = min(max_qty, self.risk.max_buy_qty(self.risk_slot, current_price))
+                if max_qty <= 0:
+                    self.state.manual_buy_max = False
+                    return {"executed": False, "reason": "Blocked by risk limits"}
             
             result = self.tool_place_order("BUY", max_qty, current_price, ts_iso)
             self.state.manual_buy_max = False
@@ -375,25 +584,107 @@ class TraderAgent:
     def initialize(self, ticker: str, starting_cash: float) -> Dict[str, Any]:
         data_dir = Path("data")
         df, csv_path = download_and_prepare(ticker, data_dir)
+        return self.initialize_from_df(ticker, df, starting_cash, csv_path)
+
+    def initialize_from_df(self, ticker: str, df: pd.DataFrame, starting_cash: float,
+                           csv_path: Optional[Path] = None) -> Dict[str, Any]:
+        """Start a session on already-prepared OHLCV bars (IST index, market hours)."""
+        csv_path = Path(csv_path) if csv_path is not None else Path("data") / f"{ticker.replace('.', '_')}_in_memory.csv"
         stream = StreamCursor(df)
 
         state = AppState(
             ticker=ticker, data_df=df, csv_path=csv_path, stream=stream,
-            portfolio=Portfolio(cash=float(starting_cash))
+            chart=NullCandles() if self.headless else Candles(viewport_bars=self.chart_viewport_bars),
+            portfolio=Portfolio(cash=float(starting_cash), cost_model=self.cost_model),
+            echo_logs=not self.headless
         )
+        state.chart.latency = state.latency
         state.chart.init_context(stream.get_context_df())
+        state.indicators.seed(stream.get_context_df())
         state.log(f"🚀 INTELLIGENT TRADER READY: {csv_path.name} | Starting Capital: ₹{starting_cash}")
         state.log(f"📊 Context day plotted - Trading starts with next available day")
         state.log(f"🎯 AGGRESSIVE MODE: Up to 90% capital deployment, intelligent learning system active")
 
         self.state = state
+        self.journal.record_session(state.session_id, ticker, self._session_ts(), float(starting_cash),
+                                    state.portfolio.lot_method)
+        self._register_risk()
+        self._build_agent(ticker)
+        
+        return {
+            "fig": state.chart.to_json(),
+            "csv_path": str(csv_path),
+            "logs": state.logs[-10:],
+            "portfolio": state.portfolio.snapshot()
+        }
 
+    def resume(self, path: Path) -> Dict[str, Any]:
+        """Restore a session (cursor, portfolio, memory, chart) from a checkpoint inside CHECKPOINT_DIR."""
+        state = load_checkpoint(Path(path), root=self.checkpointer.directory)
+        self.state = state
+        state.chart.latency = state.latency
+        state.log(f"♻️ SESSION RESUMED from {Path(path).name} | "
+                  f"Bar {state.stream.position}/{len(state.stream._times)} | "
+                  f"Cash: ₹{state.portfolio.cash:.2f} Shares: {state.portfolio.shares}")
+        self.journal.record_resume(state.session_id, state.ticker, self._session_ts(), state.stream.position)
+        self._register_risk()
+        self._build_agent(state.ticker)
+        
+        return {
+            "fig": state.chart.to_json(),
+            "csv_path": str(state.csv_path),
+            "logs": state.logs[-10:],
+            "portfolio": state.portfolio.snapshot()
+        }
+
+    def checkpoint(self) -> Optional[Path]:
+        """Queue an immediate checkpoint of the current session and wait for it."""
+        if self.state is None:
+            return None
+        path = self.checkpointer.save(self.state, self.state.stream.position)
+        self.journal.flush()
+        self.checkpointer.flush(timeout=30)
+        return path
+
+    def seek(self, bar_idx: int) -> Dict[str, Any]:
+        """
+        Fast-forward to trading bar `bar_idx`. The policy makes no decisions on the
+        skipped bars, but they are closed normally: resting orders and the
+        protective stop are still matched (and journaled) against each bar.
+        """
+        if self.state is None:
+            return {"ok": False, "reason": "Agent not initialized"}
+        stream = self.state.stream
+        total = len(stream._times)
+        if bar_idx < stream.position:
+            return {"ok": False, "reason": f"Cannot seek backwards from bar {stream.position}; resume an earlier checkpoint instead"}
+        bar_idx = min(int(bar_idx), total)
+        while stream.position < bar_idx:
+            if self.tool_get_next_open_volume().get("done"):
+                break
+            self.tool_on_bar_close()
+        self.state.log(f"⏩ SEEK: skipped to bar {stream.position}/{total} without policy decisions "
+                       f"(resting orders still matched)")
+        return {"ok": True, "bar": stream.position}
+
+    def _session_ts(self) -> pd.Timestamp:
+        # Market time of the bar the session is positioned at
+        times = self.state.stream._times
+        if not times:
+            return pd.Timestamp.now(tz="UTC")
+        return times[min(self.state.stream.position, len(times) - 1)]
+
+    def _build_agent(self, ticker: str):
         # Build enhanced LLM agent with learning tools
         if self.use_llm:
             tools = [
                 FunctionTool(self.tool_get_next_open_volume, description="Get next 1m bar's Open, Volume & technical indicators."),
                 FunctionTool(self.tool_get_trading_memory, description="Access complete trading history and performance metrics for learning."),
                 FunctionTool(self.tool_place_order, description="Place aggressive long-only order (BUY/SELL integer qty at current Open)."),
+                FunctionTool(self.tool_place_resting_order, description="Rest a LIMIT, STOP or STOP_LIMIT order (side, kind, qty, limit_price, stop_price) matched against each bar's range."),
+                FunctionTool(self.tool_place_bracket, description="Place an OCO exit bracket (qty, take_profit, stop_loss) for the long position."),
+                FunctionTool(self.tool_cancel_order, description="Cancel a resting order by id."),
+                FunctionTool(self.tool_list_orders, description="List resting orders."),
                 FunctionTool(self.tool_on_bar_close, description="Reveal bar Close, update chart & track performance."),
                 FunctionTool(self.tool_portfolio_state, description="Get detailed portfolio status with utilization metrics."),
             ]
@@ -402,15 +693,8 @@ class TraderAgent:
                 name="IntelligentTrader",
                 model_client=self.model_client,
                 tools=tools,
-                system_message=_make_intelligent_policy_prompt(ticker)
+                system_message=_make_intelligent_policy_prompt(ticker, self.protective_stop_pct)
             )
-        
-        return {
-            "fig": state.chart.to_json(),
-            "csv_path": str(csv_path),
-            "logs": state.logs[-10:],
-            "portfolio": state.portfolio.snapshot()
-        }
 
     # ------------------------
     # Enhanced decision making per bar
@@ -511,6 +795,20 @@ class TraderAgent:
         if self.state is None:
             return {"done": True}
 
+        with self.state.latency.span("step"):
+            result = self._step()
+
+        # Cheap periodic checkpoint between bars (written in the background);
+        # the journal is committed at least as far as every checkpoint.
+        if result.get("done"):
+            if self.checkpointer.every_n_bars > 0:
+                self.checkpointer.save(self.state, self.state.stream.position)
+            self.journal.flush()
+        elif self.checkpointer.maybe_save(self.state, self.state.stream.position):
+            self.journal.flush()
+        return result
+
+    def _step(self) -> Dict[str, Any]:
         # Check if more bars available
         check = self.tool_get_next_open_volume()
         if check.get("done"):
@@ -522,6 +820,8 @@ class TraderAgent:
                 self.state.log(f"📈 FINAL RESULTS: PnL=₹{final_snap.get('total_pnl', 0)} | "
                               f"Total Trades: {len(memory.trade_history)} | "
                               f"Win Rate: {memory.performance_metrics.get('win_rate', 0)*100:.1f}%")
+            self.release_risk()
+            self.journal.flush()
             return {"done": True}
 
         ts_iso = check["ts"]
@@ -533,8 +833,12 @@ class TraderAgent:
         manual_result = None
         if self.state.manual_sell_all:
             manual_result = self.manual_sell_all_shares(o, ts_iso)
+            self._journal_decision(ts_iso, "manual", "SELL_ALL", manual_result.get("shares", 0),
+                                   manual_result.get("reason", "manual_override"))
         elif self.state.manual_buy_max:
             manual_result = self.manual_buy_max_shares(o, ts_iso)
+            self._journal_decision(ts_iso, "manual", "BUY_MAX", manual_result.get("shares", 0),
+                                   manual_result.get("reason", "manual_override"))
 
         # If no manual override, proceed with agent/fallback decision
         if not manual_result or not manual_result.get("executed"):
@@ -542,8 +846,9 @@ class TraderAgent:
             if self.use_llm and self.agent:
                 # Provide rich context to LLM
                 try:
-                    memory_data = self.tool_get_trading_memory()
-                    portfolio_data = self.tool_portfolio_state()
+                    with self.state.latency.span("snapshot"):
+                        memory_data = self.tool_get_trading_memory()
+                        portfolio_data = self.tool_portfolio_state()
                     
                     prompt = f"""
 🎯 NEXT BAR ANALYSIS:
@@ -574,13 +879,18 @@ MAKE YOUR DECISION NOW!
                     
                     message = TextMessage(content=prompt, source="user")
                     # Use sync call to agent
-                    response = asyncio.run(self._get_agent_response(message))
+                    with self.state.latency.span("llm"):
+                        response = asyncio.run(self._get_agent_response(message))
+                    reply = getattr(getattr(response, "chat_message", None), "content", "")
+                    self._journal_decision(ts_iso, "llm", "TOOL_CALLS", 0, str(reply)[:500])
                     
                 except Exception as e:
                     self.state.log(f"⚠️ Agent error, using fallback: {str(e)}")
                     # Use fallback policy
                     hist = self.state.stream.get_context_df().copy()
-                    action, qty, reason = self._aggressive_intelligent_policy(o, v, hist)
+                    with self.state.latency.span("policy"):
+                        action, qty, reason = self._aggressive_intelligent_policy(o, v, hist)
+                    self._journal_decision(ts_iso, "fallback_after_llm_error", action, qty, reason)
                     
                     if action != "HOLD" and qty > 0:
                         self.tool_place_order(action, qty, o, ts_iso)
@@ -589,7 +899,9 @@ MAKE YOUR DECISION NOW!
             else:
                 # Enhanced deterministic fallback policy
                 hist = self.state.stream.get_context_df().copy()
-                action, qty, reason = self._aggressive_intelligent_policy(o, v, hist)
+                with self.state.latency.span("policy"):
+                    action, qty, reason = self._aggressive_intelligent_policy(o, v, hist)
+                self._journal_decision(ts_iso, "fallback", action, qty, reason)
                 
                 if action != "HOLD" and qty > 0:
                     self.tool_place_order(action, qty, o, ts_iso)
@@ -599,9 +911,12 @@ MAKE YOUR DECISION NOW!
         # Always reveal close
         close_result = self.tool_on_bar_close()
         
+        # Encoded lazily on first use (usually the UI poll), which records the "figure" stage
+        fig = self.state.chart.to_json()
+        
         result = {
             "done": close_result.get("done", False),
-            "fig": self.state.chart.to_json(),
+            "fig": fig,
             "logs": self.state.logs[-200:],
             "portfolio": self.tool_portfolio_state()
         }
@@ -611,6 +926,27 @@ MAKE YOUR DECISION NOW!
             
         return result
 
+    # ------------------------
+    # Telemetry
+    # ------------------------
+    def latency_report(self) -> Dict[str, Any]:
+        """Per-stage p50/p95/p99 latencies (ms) for the current session."""
+        if self.state is None:
+            return {}
+        return {
+            "ticker": self.state.ticker,
+            "bottleneck": self.state.latency.bottleneck(),
+            "stages": self.state.latency.summary(),
+        }
+
+    def dump_latency(self, path: Optional[Path] = None) -> Optional[Path]:
+        """Write the latency report to JSON (defaults to data/latency_<ticker>.json)."""
+        if self.state is None:
+            return None
+        if path is None:
+            path = Path("data") / f"latency_{self.state.ticker.replace('.', '_')}.json"
+        return self.state.latency.dump_json(path)
+
     async def _get_agent_response(self, message):
         """Get response from the enhanced AutoGen agent"""
         try: